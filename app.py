@@ -1,10 +1,49 @@
+import threading
+
 import streamlit as st
 import pandas as pd
-from edgar_functions import get_same_sic_companies, generate_main_df
+from edgar_functions import (
+    CACHE_TTLS,
+    get_same_sic_companies,
+    get_session,
+    iter_main_df,
+    load_company_index,
+)
+
+
+# Shared across reruns and sessions
+@st.cache_resource
+def load_companies(csv_path):
+    return load_company_index(csv_path)
+
+
+@st.cache_resource
+def http_session():
+    return get_session()
+
+
+# Cached per input, so reruns triggered by widgets do not refetch from the SEC.
+# The leading underscore keeps the company table out of the cache key.
+@st.cache_data(ttl=CACHE_TTLS["default"])
+def similar_companies_for(_company_index, cik, n_accessions, n_companies):
+    return get_same_sic_companies(_company_index, cik=cik,
+                                  n_accessions=n_accessions, n_companies=n_companies)
+
+
+# (fys, tickers) -> main_df of the runs that completed, filled by the Get Data page
+@st.cache_resource(ttl=CACHE_TTLS["default"])
+def completed_main_dfs():
+    return {}
+
+
+# Cancel button callback: stops the Get Data run waiting on st.session_state.cancel_event
+def cancel_main_df():
+    st.session_state.cancel_event.set()
 
 
 # Load the data
-df = pd.read_csv("Final_company_data.csv")
+df = load_companies("Final_company_data.csv")
+http_session()
 
 # Define the list of companies
 companies_data = [
@@ -65,9 +104,9 @@ elif st.session_state.page == 2:
     # Call your function to get similar companies
     selected_company_cik = next(
         company['Cik'] for company in companies_data if company['Company'] == st.session_state.selected_company_name)
-    similar_companies = get_same_sic_companies(df, cik=int(selected_company_cik),
-                                               n_accessions=st.session_state.num_fiscal_years,
-                                               n_companies=st.session_state.num_similar_companies)
+    similar_companies = similar_companies_for(df, int(selected_company_cik),
+                                              int(st.session_state.num_fiscal_years),
+                                              int(st.session_state.num_similar_companies))
 
     # Set similar companies in session state
     st.session_state.similar_companies = similar_companies
@@ -153,14 +192,53 @@ elif st.session_state.page == 4:
 
     # Button to get data
     if st.button("Get Data"):
-        # Get the data
-        main_df = generate_main_df(st.session_state.fys, st.session_state.selected_tickers)
-
-        # Display the data as a Streamlit DataFrame
-        st.write(main_df)
-
-        # Print message indicating data is ready
-        st.write("Your data is ready to download.")
+        fys = st.session_state.fys
+        selected_tickers = st.session_state.selected_tickers
+        key = (tuple(fys), tuple(selected_tickers))
+        main_df = completed_main_dfs().get(key)
+
+        if main_df is None:
+            # Clicking Cancel reruns the script: this run stops at its next Streamlit call,
+            # which the heartbeat ticks below make come at least every half second, and the
+            # callback sets the run's cancel event for fetches still being waited on.
+            # Closing the generator then cancels the fetches that have not started.
+            cancel_event = threading.Event()
+            st.session_state.cancel_event = cancel_event
+            st.button("Cancel", on_click=cancel_main_df)
+            progress = st.progress(0.0, text="Fetching data...")
+            table = st.empty()
+
+            # Get the data, showing each company as soon as it is ready
+            company_dfs = {}
+            results = iter_main_df(fys, selected_tickers, cancel_event=cancel_event, heartbeat=0.5)
+            try:
+                for ticker, company_df in results:
+                    if ticker is None:
+                        progress.progress(len(company_dfs) / len(selected_tickers),
+                                          text=f"Fetching data... ({len(company_dfs)}/{len(selected_tickers)})")
+                        continue
+                    company_dfs[ticker] = company_df
+                    progress.progress(len(company_dfs) / len(selected_tickers),
+                                      text=f"Fetched {ticker} ({len(company_dfs)}/{len(selected_tickers)})")
+                    table.dataframe(pd.concat(company_dfs.values(), ignore_index=True))
+            finally:
+                results.close()
+            progress.empty()
+            table.empty()
+
+            if cancel_event.is_set():
+                st.write("Fetching was cancelled.")
+            else:
+                main_df = pd.concat([company_dfs[ticker] for ticker in selected_tickers], ignore_index=True) \
+                    if company_dfs else pd.DataFrame()
+                completed_main_dfs()[key] = main_df
+
+        if main_df is not None:
+            # Display the data as a Streamlit DataFrame
+            st.write(main_df)
+
+            # Print message indicating data is ready
+            st.write("Your data is ready to download.")
 
 
     # Back button
@@ -0,0 +1,146 @@
+"""
+Compares the lxml iterparse linkbase parsers with the BeautifulSoup code they replaced.
+
+Builds a synthetic label linkbase and calculation linkbase of the size of a large
+filer's, parses each with both engines and prints time and peak traced memory.
+
+Usage:
+    python benchmarks/bench_linkbase.py [--labels 40000] [--arcs 20000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import edgar_functions as ef  # noqa: E402
+
+
+def make_label_linkbase(n_labels):
+    """
+    Builds a label linkbase with n_labels labels, four per concept, as
+    loc/label/labelArc triples like the ones filers publish.
+    """
+    n_concepts = max(n_labels // 4, 1)
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+        '<link:labelLink xlink:role="http://www.xbrl.org/2003/role/link" xlink:type="extended">'
+    ]
+    for i in range(n_labels):
+        concept = f"Concept{i % n_concepts}"
+        parts.append(
+            f'<link:loc xlink:type="locator" '
+            f'xlink:href="https://xbrl.fasb.org/us-gaap/2023/elts/us-gaap-2023.xsd#us-gaap_{concept}" '
+            f'xlink:label="loc_us-gaap_{concept}"/>'
+        )
+        parts.append(
+            f'<link:label id="lab_{i}" xlink:label="lab_us-gaap_{concept}_{i:08x}" '
+            f'xlink:role="http://www.xbrl.org/2003/role/label" xlink:type="resource" '
+            f'xml:lang="en-US">Label number {i} for {concept} &amp; more</link:label>'
+        )
+        parts.append(
+            f'<link:labelArc xlink:arcrole="http://www.xbrl.org/2003/arcrole/concept-label" '
+            f'xlink:from="loc_us-gaap_{concept}" xlink:to="lab_us-gaap_{concept}_{i:08x}" xlink:type="arc"/>'
+        )
+    parts.append("</link:labelLink></link:linkbase>")
+    return "".join(parts).encode()
+
+
+def make_calculation_linkbase(n_arcs):
+    """
+    Builds a calculation linkbase with n_arcs summation arcs under 50 parents.
+    """
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink">'
+        '<link:calculationLink xlink:role="http://example.com/role/BalanceSheet" xlink:type="extended">'
+    ]
+    for i in range(n_arcs):
+        parent = f"Parent{i % 50}"
+        parts.append(
+            f'<link:loc xlink:type="locator" xlink:href="x.xsd#us-gaap_{parent}" '
+            f'xlink:label="loc_us-gaap_{parent}_{i}"/>'
+        )
+        parts.append(
+            f'<link:calculationArc order="{i}" weight="1.0" '
+            f'xlink:arcrole="http://www.xbrl.org/2003/arcrole/summation-item" '
+            f'xlink:from="loc_us-gaap_{parent}_{i}" xlink:to="loc_us-gaap_Child{i}_{i}" xlink:type="arc"/>'
+        )
+    parts.append("</link:calculationLink></link:linkbase>")
+    return "".join(parts).encode()
+
+
+def soup_label_linkbase(content):
+    # The BeautifulSoup code get_label_calc_tags used before the iterparse parser
+    lab_soup = BeautifulSoup(content, "xml")
+    label_tags = lab_soup.find_all("link:label")
+    label_tags.extend(lab_soup.find_all("label"))
+    lab_tags = {}
+    lab_pattern = re.compile(r"us-gaap_(.*?)(?:_.*?)?$")
+    common_pattern = re.compile(r"(?<=_)(.*?)(?=_)")
+    for tag in label_tags:
+        label_id = tag.get("xlink:label")
+        match1 = lab_pattern.search(label_id)
+        match2 = common_pattern.search(label_id)
+        label_tag = match1.group(1) if match1 else (match2.group(1) if match2 else label_id)
+        lab_tags.setdefault(label_tag, []).append(tag.text)
+    return lab_tags
+
+
+def soup_calculation_linkbase(content):
+    calc_soup = BeautifulSoup(content, "xml")
+    arcs = calc_soup.find_all("link:calculationArc")
+    arcs.extend(calc_soup.find_all("calculationArc"))
+    cal_tags = {}
+    for arc in arcs:
+        main_fact = ef._linkbase_fact_name(arc.get("xlink:from"))
+        cal_tags.setdefault(main_fact, []).append(ef._linkbase_fact_name(arc.get("xlink:to")))
+    return cal_tags
+
+
+def measure(parse, content):
+    start = time.perf_counter()
+    result = parse(content)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    parse(content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--labels", type=int, default=40000, help="labels in the label linkbase")
+    parser.add_argument("--arcs", type=int, default=20000, help="arcs in the calculation linkbase")
+    args = parser.parse_args()
+
+    fixtures = (
+        ("label linkbase", make_label_linkbase(args.labels), soup_label_linkbase, ef.parse_label_linkbase),
+        ("calc linkbase", make_calculation_linkbase(args.arcs), soup_calculation_linkbase,
+         ef.parse_calculation_linkbase),
+    )
+    for name, content, soup_parse, lxml_parse in fixtures:
+        soup_result, soup_time, soup_peak = measure(soup_parse, content)
+        lxml_result, lxml_time, lxml_peak = measure(lxml_parse, content)
+        # find_all("link:x") and find_all("x") both matched every element, so the
+        # BeautifulSoup lists hold each entry twice
+        assert soup_result == {key: values * 2 for key, values in lxml_result.items()}
+        print(
+            f"{name} ({len(content) / 1e6:.1f} MB): "
+            f"BeautifulSoup {soup_time:.2f} s / {soup_peak / 1e6:.0f} MB peak, "
+            f"iterparse {lxml_time:.2f} s / {lxml_peak / 1e6:.1f} MB peak, "
+            f"{soup_time / lxml_time:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
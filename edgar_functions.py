@@ -3,10 +3,31 @@ import pandas as pd
 import numpy as np  
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
 import logging  
 import calendar 
+import collections
+import copy
+import functools
 import re
+import ast
+import json
+import time
+import hashlib
+import tempfile
+import shutil
+import threading
+import zipfile
+import io
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz as rf_fuzz, process as rf_process, utils as rf_utils
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 
 headers = {'user-agent':"usr@example.com"}
@@ -17,18 +38,6 @@ pd.options.display.float_format = (
 )
 
 
-# Function to extract the first element from a string representation of a list
-def extract_first_element(input_string):
-    # Regex pattern to find content between single quotes
-    pattern = r"'([^']*)'"
-    match = re.search(pattern, input_string)
-    if match:
-        # Return the first matched group (element)
-        return match.group(1)
-    else:
-        # Return None if no match is found
-        return None
-
 statement_keys_map = {
     "balance_sheet": [
         "balance sheet",
@@ -84,49 +93,807 @@ statement_keys_map = {
 }
 
 
+# ---------- Shared HTTP client ------------
+# Every request to the SEC goes through one pooled session and one token bucket, so
+# threads share keep-alive connections and together stay under the SEC's fair-access
+# cap of 10 requests per second.
+SEC_MAX_REQUESTS_PER_SECOND = 9
+HTTP_POOL_SIZE = 16
+HTTP_TIMEOUT = 30
+# Default number of threads used to fetch several companies concurrently. The shared
+# rate limiter still caps the request rate across all of them.
+FETCH_WORKERS = 8
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket. With a capacity of one token no window of one second
+    can see more than rate + 1 requests.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_rate_limiter = _TokenBucket(SEC_MAX_REQUESTS_PER_SECOND)
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the shared requests session, creating it on first use.
+
+    The session keeps up to HTTP_POOL_SIZE connections alive per host, asks for
+    gzip/deflate bodies and retries 429 and 5xx responses with backoff, honouring
+    Retry-After.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=5,
+                backoff_factor=1,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+                respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+            _session = session
+    return _session
+
+
+def sec_get(url, headers=headers):
+    """
+    GETs a URL with the shared session after taking a token from the rate limiter.
+
+    Args:
+        url (str): URL to fetch.
+        headers (dict): Headers for HTTP request.
+
+    Returns:
+        requests.Response: The response.
+    """
+    _rate_limiter.acquire()
+    return get_session().get(url, headers=headers, timeout=HTTP_TIMEOUT)
+
+
+# ---------- On-disk HTTP cache ------------
+# Responses from the SEC are stored under CACHE_DIR/http, one file per URL. The fact store,
+# tag assignments and refresh state live next to it in CACHE_DIR and are kept when the
+# HTTP cache is cleared. Override the location with the EDGAR_CACHE_DIR environment variable.
+CACHE_DIR = os.environ.get(
+    "EDGAR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".edgar_cache"),
+)
+
+# Seconds a cached response is served without contacting the SEC, per endpoint class.
+# None means the entry never expires. Once an entry is stale it is revalidated with
+# If-None-Match / If-Modified-Since when the server sent an ETag or Last-Modified.
+CACHE_TTLS = {
+    "archives": None,  # filed documents never change
+    "company_tickers": 60 * 60,
+    "submissions": 10 * 60,
+    "xbrl": 24 * 60 * 60,  # companyfacts and the other XBRL APIs
+    "bulk_submissions": 24 * 60 * 60,  # seeded from submissions.zip, rebuilt nightly
+    "default": 60 * 60,
+}
+
+
+def _cache_class(url):
+    """
+    Maps a URL to the endpoint class used to look up its TTL in CACHE_TTLS.
+
+    Args:
+        url (str): Requested URL.
+
+    Returns:
+        str: Key of CACHE_TTLS.
+    """
+    if "/Archives/edgar/data/" in url:
+        return "archives"
+    if url.endswith("company_tickers.json"):
+        return "company_tickers"
+    if "data.sec.gov/submissions/" in url:
+        return "submissions"
+    if "data.sec.gov/api/xbrl/" in url:
+        return "xbrl"
+    return "default"
+
+
+def _http_cache_dir():
+    return os.path.join(CACHE_DIR, "http")
+
+
+def _cache_path(url):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(_http_cache_dir(), key[:2], key)
+
+
+def _read_cache_entry(path):
+    """
+    Reads a cache entry written by _write_cache_entry.
+
+    Args:
+        path (str): Path of the cache file.
+
+    Returns:
+        tuple: (meta dict, body bytes), or (None, None) if the entry is missing or damaged.
+    """
+    try:
+        with open(path, "rb") as f:
+            meta = json.loads(f.readline())
+            body = f.read()
+    except (OSError, ValueError):
+        return None, None
+    if len(body) != meta.get("length"):
+        return None, None
+    return meta, body
+
+
+def _write_cache_entry(path, meta, body):
+    """
+    Writes a cache entry as one JSON metadata line followed by the raw body.
+
+    The file is written to a temporary name and moved into place with os.replace, so
+    concurrent readers and writers in other processes only ever see complete entries.
+    """
+    meta = dict(meta, length=len(body))
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError as e:
+        logging.warning(f"Could not write HTTP cache entry {path}: {e}")
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(body)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"Could not write HTTP cache entry {path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _response_from_cache(url, meta, body):
+    response = requests.Response()
+    response.url = url
+    response.status_code = meta["status"]
+    response.headers = requests.structures.CaseInsensitiveDict(meta["headers"])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response._content = body
+    return response
+
+
+def cached_get(url, headers=headers, revalidate=False):
+    """
+    GETs a URL through the on-disk cache.
+
+    Fresh entries are returned without a request. Stale entries are revalidated with a
+    conditional GET and reused on 304 Not Modified. Only 200 responses are stored. If the
+    SEC cannot be reached, a stale entry is served instead of failing.
+
+    Args:
+        url (str): URL to fetch.
+        headers (dict): Headers for HTTP request.
+        revalidate (bool): If True, revalidate a cached entry even if it is still fresh.
+
+    Returns:
+        requests.Response: Live or cached response.
+    """
+    path = _cache_path(url)
+    meta, body = _read_cache_entry(path)
+    # Entries seeded by ingest_bulk_archives carry their own class
+    cache_class = meta.get("cache_class") if meta is not None else None
+    ttl = CACHE_TTLS.get(cache_class or _cache_class(url), CACHE_TTLS["default"])
+    now = time.time()
+
+    request_headers = dict(headers)
+    if meta is not None:
+        if not revalidate and (ttl is None or now - meta["fetched_at"] < ttl):
+            return _response_from_cache(url, meta, body)
+        if meta["headers"].get("ETag"):
+            request_headers["If-None-Match"] = meta["headers"]["ETag"]
+        if meta["headers"].get("Last-Modified"):
+            request_headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+
+    try:
+        response = sec_get(url, headers=request_headers)
+    except requests.RequestException as e:
+        if meta is None:
+            raise
+        logging.warning(f"Serving stale cache entry for {url}: {e}")
+        return _response_from_cache(url, meta, body)
+
+    if response.status_code == 304 and meta is not None:
+        meta["fetched_at"] = now
+        _write_cache_entry(path, meta, body)
+        return _response_from_cache(url, meta, body)
+    if response.status_code == 200:
+        kept_headers = {
+            name: response.headers[name]
+            for name in ("Content-Type", "ETag", "Last-Modified")
+            if name in response.headers
+        }
+        _write_cache_entry(
+            path,
+            {"url": url, "status": 200, "headers": kept_headers, "fetched_at": now},
+            response.content,
+        )
+    return response
+
+
+def clear_http_cache():
+    """
+    Removes every entry from the on-disk HTTP cache. The fact store, tag assignments and
+    refresh state are kept.
+    """
+    shutil.rmtree(_http_cache_dir(), ignore_errors=True)
+    # Entries cached before CACHE_DIR/http sit in two-hex-digit directories of CACHE_DIR
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if re.fullmatch(r"[0-9a-f]{2}", name):
+            shutil.rmtree(os.path.join(CACHE_DIR, name), ignore_errors=True)
+
+
+# ---------- Ticker / CIK index ------------
+# company_tickers.json is loaded once per process into two dictionaries and reloaded
+# when it is older than TICKER_INDEX_TTL seconds or when load_ticker_index(refresh=True)
+# is called.
+TICKER_INDEX_TTL = 24 * 60 * 60
+
+_ticker_index = {"by_ticker": {}, "by_cik": {}, "loaded_at": None}
+_ticker_index_lock = threading.Lock()
+
+
+def _normalize_ticker(ticker):
+    return ticker.upper().replace(".", "-")
+
+
+def load_ticker_index(refresh=False, headers=headers):
+    """
+    Returns the process-wide ticker/CIK index, building it on first use.
+
+    Args:
+        refresh (bool): If True, revalidate company_tickers.json and rebuild the index.
+        headers (dict): Headers for HTTP request.
+
+    Returns:
+        dict: {"by_ticker": {ticker: cik}, "by_cik": {cik: ticker}, "loaded_at": timestamp}.
+            CIKs are unpadded strings.
+    """
+    with _ticker_index_lock:
+        loaded_at = _ticker_index["loaded_at"]
+        if refresh or loaded_at is None or time.time() - loaded_at > TICKER_INDEX_TTL:
+            ticker_json = cached_get(
+                "https://www.sec.gov/files/company_tickers.json",
+                headers=headers,
+                revalidate=refresh,
+            ).json()
+            by_ticker = {}
+            by_cik = {}
+            for company in ticker_json.values():
+                cik = str(company["cik_str"])
+                # Keep the first entry, which is what the old linear scan returned
+                by_ticker.setdefault(company["ticker"], cik)
+                by_cik.setdefault(cik, company["ticker"])
+            _ticker_index["by_ticker"] = by_ticker
+            _ticker_index["by_cik"] = by_cik
+            _ticker_index["loaded_at"] = time.time()
+    return _ticker_index
+
+
 def cik_matching_ticker(ticker, headers=headers, fill = True):
-    ticker = ticker.upper().replace(".", "-")
-    ticker_json = requests.get(
-        "https://www.sec.gov/files/company_tickers.json", headers=headers
-    ).json()
-
-    for company in ticker_json.values():
-        if company["ticker"] == ticker:
-            cik = str(company["cik_str"])
-            if fill:
-                cik = cik.zfill(10)
-                return cik
-            else:
-                return cik           
-    raise ValueError(f"Ticker {ticker} not found in SEC database")
-
-def get_same_sic_companies(df, cik=320193, n_accessions=3, n_companies=3):
-    tickers = []
-    sic = df[df['cik'] == cik].sic.values[0]
-    ref_ticker = df[df['cik'] == cik].tickers.values[0]
-    ref_ticker = extract_first_element(ref_ticker)
-
-    sic_df = df[df['sic'] == sic]
-    for name, ticker in sic_df[['name', 'tickers']].values:
-        t = extract_first_element(ticker)
-        if t is not None and t != ref_ticker:
+    ticker = _normalize_ticker(ticker)
+    cik = load_ticker_index(headers=headers)["by_ticker"].get(ticker)
+    if cik is None:
+        raise ValueError(f"Ticker {ticker} not found in SEC database")
+    if fill:
+        return cik.zfill(10)
+    return cik
+
+
+def ciks_for_tickers(tickers, headers=headers, fill=True):
+    """
+    Resolves many tickers to CIKs with a single index lookup each.
+
+    Args:
+        tickers (iterable): Stock ticker symbols.
+        headers (dict): Headers for HTTP request.
+        fill (bool): If True, pad CIKs to 10 digits.
+
+    Returns:
+        dict: Mapping of each input ticker to its CIK, or None if the SEC does not know it.
+    """
+    by_ticker = load_ticker_index(headers=headers)["by_ticker"]
+    ciks = {}
+    for ticker in tickers:
+        cik = by_ticker.get(_normalize_ticker(ticker))
+        if cik is not None and fill:
+            cik = cik.zfill(10)
+        ciks[ticker] = cik
+    return ciks
+
+
+def ticker_matching_cik(cik, headers=headers):
+    """
+    Looks up the primary ticker for a CIK.
+
+    Args:
+        cik (int or str): CIK number, padded or not.
+        headers (dict): Headers for HTTP request.
+
+    Returns:
+        str: Ticker symbol.
+
+    Raises:
+        ValueError: If the CIK is not in the SEC ticker file.
+    """
+    ticker = load_ticker_index(headers=headers)["by_cik"].get(str(int(cik)))
+    if ticker is None:
+        raise ValueError(f"CIK {cik} not found in SEC database")
+    return ticker
+
+# ---------- Company table index ------------
+COMPANY_DATA_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Final_company_data.csv")
+
+_company_indexes = {}
+_company_indexes_lock = threading.Lock()
+
+
+def _parse_list_column(values):
+    return [ast.literal_eval(v) if isinstance(v, str) else [] for v in values]
+
+
+class CompanyIndex:
+    """
+    The company table (Final_company_data.csv) parsed once, with real ticker lists and
+    dictionary indexes by CIK, ticker and SIC code.
+
+    Attributes:
+        frame (DataFrame): Columns cik (int64), sic (Int64), name, tickers (list) and
+            exchanges (list).
+        by_cik (dict): CIK -> row position in frame.
+        by_ticker (dict): Ticker -> CIK, for every ticker of every company.
+        by_sic (dict): SIC code -> list of CIKs in table order.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.by_cik = {}
+        self.by_ticker = {}
+        self.by_sic = {}
+        for position, (cik, sic, tickers) in enumerate(
+            zip(frame["cik"].tolist(), frame["sic"].tolist(), frame["tickers"].tolist())
+        ):
+            self.by_cik[cik] = position
+            for ticker in tickers:
+                self.by_ticker.setdefault(ticker, cik)
+            if sic is not pd.NA:
+                self.by_sic.setdefault(sic, []).append(cik)
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Builds the index from the raw CSV DataFrame, parsing the stringified lists.
+
+        Args:
+            df (DataFrame): Table as returned by pd.read_csv("Final_company_data.csv").
+
+        Returns:
+            CompanyIndex: The index.
+        """
+        frame = pd.DataFrame(
+            {
+                "cik": df["cik"].astype("int64").values,
+                "sic": df["sic"].astype("Int64").values,
+                "name": df["name"].astype(str).values,
+                "tickers": _parse_list_column(df["tickers"].values),
+                "exchanges": _parse_list_column(df["exchanges"].values),
+            }
+        )
+        return cls(frame)
+
+    def company(self, cik):
+        """
+        Returns the table row for a CIK as a dict, or None if the CIK is not in the table.
+        """
+        position = self.by_cik.get(int(cik))
+        if position is None:
+            return None
+        return self.frame.iloc[position].to_dict()
+
+    def name(self, cik):
+        position = self.by_cik.get(int(cik))
+        return "" if position is None else self.frame["name"].iat[position]
+
+    def sic(self, cik):
+        position = self.by_cik.get(int(cik))
+        return None if position is None else self.frame["sic"].iat[position]
+
+    def first_ticker(self, cik):
+        position = self.by_cik.get(int(cik))
+        if position is None:
+            return None
+        tickers = self.frame["tickers"].iat[position]
+        return tickers[0] if len(tickers) else None
+
+    def same_sic(self, sic):
+        """
+        Returns the CIKs with the given SIC code, in table order.
+        """
+        return self.by_sic.get(sic, [])
+
+
+def load_company_index(csv_path=COMPANY_DATA_CSV):
+    """
+    Loads the company table once per process.
+
+    The parsed table is saved as Parquet in CACHE_DIR and reused by later processes
+    until the CSV changes.
+
+    Args:
+        csv_path (str): Path of the company table CSV.
+
+    Returns:
+        CompanyIndex: The indexed table.
+    """
+    csv_path = os.path.abspath(csv_path)
+    with _company_indexes_lock:
+        if csv_path in _company_indexes:
+            return _company_indexes[csv_path]
+        key = hashlib.sha256(csv_path.encode("utf-8")).hexdigest()[:16]
+        parquet_path = os.path.join(CACHE_DIR, f"company_data_{key}.parquet")
+        index = None
+        try:
+            if os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+                frame = pd.read_parquet(parquet_path)
+                # Parquet hands list columns back as arrays
+                frame["tickers"] = frame["tickers"].map(list)
+                frame["exchanges"] = frame["exchanges"].map(list)
+                index = CompanyIndex(frame)
+        except (OSError, ImportError, ValueError):
+            pass
+        if index is None:
+            index = CompanyIndex.from_frame(pd.read_csv(csv_path))
             try:
-                accession_numbers = get_filtered_filings(t, just_accession_numbers=True, ten_k=True)
-                if len(accession_numbers) > n_accessions:
-                    c = cik_matching_ticker(t, headers, fill=True)
-                    name = df[df['cik'] == int(c)]['name']
-                    if len(name) != 0:
-                        name = name.values[0]
-                    else:
-                        name = ""
-                    tickers.append((t, c, name))
-            except ValueError as e:
-                continue
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+                index.frame.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, parquet_path)
+            except (OSError, ImportError, ValueError) as e:
+                logging.warning(f"Could not save company table as Parquet: {e}")
+        _company_indexes[csv_path] = index
+        return index
+
+
+def _first_n_in_order(items, func, n, max_workers=FETCH_WORKERS):
+    """
+    Applies func to items on a thread pool and returns the first n non-None results
+    in item order.
+
+    At most max_workers items are in flight at once, and no new items are started
+    once the first n results are known, so a large input is only checked as far as
+    needed. The result does not depend on which calls finish first.
+
+    Args:
+        items (list): Inputs, in priority order.
+        func (callable): Returns a result, or None if the item should be skipped.
+        n (int): Number of results wanted.
+        max_workers (int): Number of threads.
+
+    Returns:
+        list: Up to n results.
+    """
+    found = []
+    if n <= 0:
+        return found
+    results = {}
+    pending = {}
+    next_index = 0
+    resolved = 0
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while True:
+            while len(pending) < max_workers and next_index < len(items):
+                pending[executor.submit(func, items[next_index])] = next_index
+                next_index += 1
+            if not pending:
+                return found
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+            # Only accept results once everything before them is known
+            while resolved in results:
+                result = results.pop(resolved)
+                resolved += 1
+                if result is not None:
+                    found.append(result)
+                    if len(found) == n:
+                        return found
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _order_candidates(candidates, order):
+    """
+    Sorts peer candidate tickers by an ordering hint, keeping table order for ties.
+
+    Args:
+        candidates (list): Ticker symbols in table order.
+        order (callable or iterable or None): A sort key taking a ticker, or tickers to
+            check first (e.g. peers listed by market cap, largest first).
+
+    Returns:
+        list: Reordered ticker symbols.
+    """
+    if order is None:
+        return candidates
+    if callable(order):
+        return sorted(candidates, key=order)
+    priority = {ticker: i for i, ticker in enumerate(order)}
+    return sorted(candidates, key=lambda t: priority.get(t, len(priority)))
+
+
+def get_same_sic_companies(df, cik=320193, n_accessions=3, n_companies=3, order=None,
+                           max_workers=FETCH_WORKERS):
+    """
+    Finds companies in the same SIC code that have more than n_accessions 10-K filings.
+
+    Candidates are checked concurrently and the search stops as soon as n_companies
+    peers are confirmed. The result is the same as checking candidates one by one.
+
+    Args:
+        df (CompanyIndex or DataFrame): Company table from load_company_index, or the raw
+            DataFrame read from Final_company_data.csv.
+        cik (int): CIK of the reference company.
+        n_accessions (int): A peer must have more 10-K filings than this.
+        n_companies (int): Number of peers to return.
+        order (callable or iterable or None): Ordering hint for candidates, see
+            _order_candidates. Defaults to table order.
+        max_workers (int): Number of threads checking candidates.
+
+    Returns:
+        list: Tuples of (ticker, 10-digit CIK, name).
+    """
+    if not isinstance(df, CompanyIndex):
+        df = CompanyIndex.from_frame(df)
+    sic = df.sic(cik)
+    ref_ticker = df.first_ticker(cik)
+
+    candidates = []
+    for peer_cik in df.same_sic(sic):
+        t = df.first_ticker(peer_cik)
+        if t is not None and t != ref_ticker:
+            candidates.append(t)
+
+    def check_peer(t):
+        try:
+            accession_numbers = get_filtered_filings(t, just_accession_numbers=True, ten_k=True)
+            if len(accession_numbers) > n_accessions:
+                c = cik_matching_ticker(t, headers, fill=True)
+                return (t, c, df.name(c))
+        except ValueError as e:
+            return None
+        return None
+
+    return _first_n_in_order(
+        _order_candidates(candidates, order), check_peer, n_companies, max_workers
+    )
+
+
+# ---------- Company handle ------------
+# Seconds a handle returned by get_company is reused before a fresh one is created.
+COMPANY_HANDLE_TTL = 10 * 60
+# Handles kept at most; the least recently used ones are dropped first.
+COMPANY_HANDLE_LIMIT = 64
+
+_companies = collections.OrderedDict()
+_companies_lock = threading.Lock()
+
+
+class Company:
+    """
+    One company's SEC data, fetched lazily and at most once per handle.
+
+    Attributes such as submissions, facts or tags are computed on first access and
+    memoized, and attributes built from the same download share it. Each attribute is
+    computed under its own lock, so threads asking for the same attribute wait for one
+    download instead of starting their own.
+
+    Args:
+        ticker (str): Stock ticker symbol. Looked up from the CIK if not given.
+        cik (int or str): CIK number. Looked up from the ticker if not given.
+        headers (dict): Headers for HTTP request.
+    """
+
+    def __init__(self, ticker=None, cik=None, headers=headers):
+        if ticker is None and cik is None:
+            raise ValueError("Company needs a ticker or a CIK")
+        if ticker is None:
+            ticker = ticker_matching_cik(cik, headers)
+        self.ticker = ticker
+        if cik is None:
+            self.cik = cik_matching_ticker(ticker, headers)
+        else:
+            self.cik = str(int(cik)).zfill(10)
+        self.headers = headers
+        self.created_at = time.time()
+        self._values = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Company(ticker={self.ticker!r}, cik={self.cik!r})"
+
+    def _memoized(self, key, compute):
+        if key in self._values:
+            return self._values[key]
+        with self._locks_lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._values:
+                self._values[key] = compute()
+        return self._values[key]
+
+    @property
+    def submissions(self):
+        """dict: The submissions JSON."""
+        url = f"https://data.sec.gov/submissions/CIK{self.cik}.json"
+        return self._memoized(
+            "submissions", lambda: cached_get(url, headers=self.headers).json()
+        )
+
+    @property
+    def filings(self):
+        """DataFrame: Recent filings from the submissions JSON."""
+        return self._memoized(
+            "filings", lambda: pd.DataFrame(self.submissions["filings"]["recent"])
+        )
+
+    def filtered_filings(self, ten_k=True, just_accession_numbers=False):
+        """
+        Returns the 10-K or 10-Q filings, see get_filtered_filings.
+        """
+        # Filter for 10-K or 10-Q forms
+        df = self.filings[self.filings["form"] == ("10-K" if ten_k else "10-Q")]
+        # Return accession numbers if specified
+        if just_accession_numbers:
+            df = df.set_index("reportDate")
+            accession_df = df["accessionNumber"]
+            return accession_df
+        else:
+            return df
+
+    @property
+    def fact_store_cik(self):
+        """str: The CIK, once the company's fact store partition is up to date."""
+        return self._memoized(
+            "fact_store", lambda: _ensure_fact_partition(self.cik, self.headers)
+        )
+
+    @property
+    def facts(self):
+        """DataFrame: The us-gaap facts, as returned by facts_DF."""
+        return self._memoized("facts", lambda: _read_us_gaap_facts(self.fact_store_cik))
+
+    @property
+    def labels(self):
+        """dict: us-gaap concept -> label."""
+        return self._memoized(
+            "labels", lambda: read_fact_labels(self.fact_store_cik).get("us-gaap", {})
+        )
+
+    @property
+    def tags(self):
+        """dict: Linkbase-based tag assignment, as returned by get_label_calc_tags."""
+        return self._memoized("tags", lambda: _compute_label_calc_tags(self))
+
+    @property
+    def annual(self):
+        """DataFrame: Annual pivot, as returned by annual_facts."""
+        return self._memoized(
+            "annual",
+            lambda: _annual_pivot(
+                self.filtered_filings(ten_k=True, just_accession_numbers=True),
+                self.facts,
+                self.labels,
+            ),
+        )
+
+    @property
+    def quarterly(self):
+        """DataFrame: Quarterly pivot, as returned by quarterly_facts."""
+        return self._memoized(
+            "quarterly",
+            lambda: _quarterly_pivot(
+                self.filtered_filings(ten_k=False, just_accession_numbers=True),
+                self.facts,
+                self.labels,
+            ),
+        )
+
+
+def get_company(ticker=None, cik=None, headers=headers):
+    """
+    Returns the shared Company handle for a ticker or CIK.
+
+    Handles are reused for COMPANY_HANDLE_TTL seconds, so the module functions below
+    share downloads and parsed data while a handle is live. At most
+    COMPANY_HANDLE_LIMIT handles are kept, dropping the least recently used.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        cik (int or str): CIK number.
+        headers (dict): Headers for HTTP request.
 
-    if len(tickers) < n_companies:
-        return tickers
+    Returns:
+        Company: The handle.
+    """
+    if cik is None:
+        key = cik_matching_ticker(ticker, headers)
     else:
-        return tickers[:n_companies]
+        key = str(int(cik)).zfill(10)
+    now = time.time()
+    with _companies_lock:
+        for expired in [k for k, c in _companies.items() if now - c.created_at > COMPANY_HANDLE_TTL]:
+            del _companies[expired]
+        company = _companies.get(key)
+        if company is None:
+            company = Company(ticker=ticker, cik=key, headers=headers)
+            _companies[key] = company
+            while len(_companies) > COMPANY_HANDLE_LIMIT:
+                _companies.popitem(last=False)
+        else:
+            _companies.move_to_end(key)
+    return company
+
+
+def clear_company_handles(ciks=None):
+    """
+    Drops shared Company handles, so the next calls fetch fresh data.
+
+    Args:
+        ciks (iterable): CIKs whose handles are dropped. Defaults to all.
+    """
+    with _companies_lock:
+        if ciks is None:
+            _companies.clear()
+        else:
+            for cik in ciks:
+                _companies.pop(str(int(cik)).zfill(10), None)
 
 
 def get_submission_data_for_ticker(ticker, headers=headers, only_filings_df=False):
@@ -139,14 +906,12 @@ def get_submission_data_for_ticker(ticker, headers=headers, only_filings_df=Fals
     Returns:
         json: The submissions for the company.
     """
-    cik = cik_matching_ticker(ticker)
-    headers = headers
-    url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-    company_json = requests.get(url, headers=headers).json()
+    company = get_company(ticker, headers=headers)
     if only_filings_df:
-        return pd.DataFrame(company_json["filings"]["recent"])
+        return company.filings.copy()
     else:
-        return company_json
+        # A copy, so callers cannot change the handle's submissions
+        return copy.deepcopy(company.submissions)
 
 
 def get_filtered_filings(
@@ -164,27 +929,18 @@ def get_filtered_filings(
     Returns:
         DataFrame or Series: DataFrame of filings or Series of accession numbers.
     """
-    # Fetch submission data for the given ticker
-    company_filings_df = get_submission_data_for_ticker(
-        ticker, only_filings_df=True, headers=headers)
-    # Filter for 10-K or 10-Q forms
-    df = company_filings_df[company_filings_df["form"] == ("10-K" if ten_k else "10-Q")]
-    # Return accession numbers if specified
-    if just_accession_numbers:
-        df = df.set_index("reportDate")
-        accession_df = df["accessionNumber"]
-        return accession_df
-    else:
-        return df
+    return get_company(ticker, headers=headers).filtered_filings(ten_k, just_accession_numbers)
 
 
-def get_facts(ticker, headers=headers):
+def get_facts(ticker, headers=headers, concepts=None, taxonomies=None):
     """
     Retrieves company facts for a given ticker.
 
     Args:
         ticker (str): Stock ticker symbol.
         headers (dict): Headers for HTTP request.
+        concepts (iterable): If given, only these concepts are parsed and returned.
+        taxonomies (iterable): If given, only concepts of these taxonomies are parsed.
 
     Returns:
         dict: Company facts in JSON format.
@@ -194,86 +950,785 @@ def get_facts(ticker, headers=headers):
     # Construct URL for company facts
     url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
     # Fetch and return company facts
-    company_facts = requests.get(url, headers=headers).json()
-    return company_facts
+    response = cached_get(url, headers=headers)
+    if concepts is None and taxonomies is None:
+        return response.json()
+    return parse_company_facts(response.content, concepts, taxonomies)
+
+
+# ---------- Streaming company facts parser ------------
+# A companyfacts document is {"cik":..,"entityName":..,"facts":{taxonomy:{concept:{..}}}}
+# and can be tens of MB. In the compact layout the SEC serves, every concept object
+# starts with a "label" key, so the parser below finds concepts by searching the raw
+# bytes for '":{"label":' and only decodes and JSON-decodes the slices of the concepts
+# that were asked for, one at a time. No text copy of the document and no Python objects
+# are built for the rest. The marker cannot occur inside a
+# JSON string, where quotes are escaped. The scan is checked before anything is yielded:
+# every concept must have been found (one marker per "label" and "units" key) in the
+# compact layout, otherwise the whole document is parsed with json.loads.
+_facts_concept_marker = b'":{"label":'
+_json_decoder = json.JSONDecoder()
+
+
+def company_facts_header(content):
+    """
+    Decodes the top-level fields of a raw company facts document, without its facts.
 
+    Args:
+        content (bytes): Raw company facts JSON.
 
-def facts_DF(ticker, headers=headers):
+    Returns:
+        dict: Top-level fields such as "cik" and "entityName".
     """
-    Converts company facts into a DataFrame.
+    facts_start = content.find(b'"facts":')
+    if facts_start == -1:
+        return {k: v for k, v in json.loads(content).items() if k != "facts"}
+    return json.loads(content[:facts_start].decode("utf-8").rstrip().rstrip(",") + "}")
+
+
+def iter_company_facts(company_facts, concepts=None, taxonomies=None):
+    """
+    Yields the concepts of a company facts document one at a time.
 
     Args:
-        ticker (str): Stock ticker symbol.
-        headers (dict): Headers for HTTP request.
+        company_facts (bytes or dict): Raw company facts JSON, or an already parsed document.
+        concepts (iterable): Concepts to yield. Defaults to all.
+        taxonomies (iterable): Taxonomies to yield from. Defaults to all.
 
-    Returns:
-        tuple: DataFrame of facts and a dictionary of labels.
+    Yields:
+        tuple: (taxonomy, concept, details), where details is the concept's JSON object
+            with "label", "description" and "units".
     """
-    # Retrieve facts data
-    facts = get_facts(ticker, headers)
-    us_gaap_data = facts["facts"]["us-gaap"]
-    df_data = []
-
-    # Process each fact and its details
-    for fact, details in us_gaap_data.items():
-        for unit in details["units"]:
-            for item in details["units"][unit]:
-                row = item.copy()
-                row["fact"] = fact
-                df_data.append(row)
-
-    df = pd.DataFrame(df_data)
-    # Convert 'end' and 'start' to datetime
-    df["end"] = pd.to_datetime(df["end"])
-    df["start"] = pd.to_datetime(df["start"])
-    # Drop duplicates and set index
-    df = df.drop_duplicates(subset=["fact", "end", "val"])
-    df.set_index("end", inplace=True)
-    # Create a dictionary of labels for facts
-    labels_dict = {fact: details["label"] for fact, details in us_gaap_data.items()}
-    return df, labels_dict
+    concepts = None if concepts is None else set(concepts)
+    taxonomies = None if taxonomies is None else set(taxonomies)
+    if isinstance(company_facts, dict):
+        for taxonomy, concept_map in company_facts.get("facts", {}).items():
+            if taxonomies is None or taxonomy in taxonomies:
+                for concept, details in concept_map.items():
+                    if concepts is None or concept in concepts:
+                        yield taxonomy, concept, details
+        return
+
+    content = company_facts.encode("utf-8") if isinstance(company_facts, str) else company_facts
+    entries = _scan_company_facts(content, concepts, taxonomies)
+    if entries is None:
+        # Not the compact layout the SEC serves: parse it all
+        yield from iter_company_facts(json.loads(content), concepts, taxonomies)
+        return
+    for taxonomy, concept, value_start, value_end in entries:
+        # The slice runs up to the next concept's key; raw_decode stops at the object's end
+        details, _ = _json_decoder.raw_decode(content[value_start:value_end].decode("utf-8"))
+        yield taxonomy, concept, details
+
+
+def _scan_company_facts(content, concepts=None, taxonomies=None):
+    """
+    Locates the requested concepts of a compact company facts document.
 
-def best_label_score_tags(actual_label, list_of_labels_used):
-    scores= []
-    for labels in list_of_labels_used:
-        score1 = fuzz.token_sort_ratio(actual_label, labels)
-        score2 = fuzz.WRatio(actual_label, labels)
-        score = (score1 + score2)/2
-        scores.append(score)
-    return max(scores)
+    Args:
+        content (bytes): Raw company facts JSON.
+        concepts (set): Concepts to locate. Defaults to all.
+        taxonomies (set): Taxonomies to locate them in. Defaults to all.
 
-def max_value_key(tags_dictionary):
-    # Check if the dictionary is empty
-    if not tags_dictionary:
+    Returns:
+        list: (taxonomy, concept, start, end) tuples, where content[start:end] holds the
+            concept's object followed by what separates it from the next concept, or None
+            if the document is not in the compact layout and the scan cannot be trusted.
+    """
+    position = content.find(b'"facts":')
+    if position == -1:
         return None
-    
-    # Find the key with the maximum value
-    max_key = max(tags_dictionary, key=tags_dictionary.get)
-    
-    # Check if the max value is less than 60
-    if tags_dictionary[max_key] < 60:
-        return "No tags"
-    
-    return max_key
+    entries = []
+    n_concepts = 0
+    taxonomy = None
+    while True:
+        position = content.find(_facts_concept_marker, position + 1)
+        if position == -1:
+            break
+        key_start = content.rfind(b'"', 0, position) + 1
+        before_key = content[key_start - 2:key_start - 1]
+        if before_key == b"{":
+            # First concept of a taxonomy: the taxonomy key comes right before it
+            if content[key_start - 4:key_start - 1] != b'":{':
+                return None
+            taxonomy_end = key_start - 4
+            taxonomy = content[content.rfind(b'"', 0, taxonomy_end) + 1:taxonomy_end].decode("utf-8")
+        elif before_key != b"," or taxonomy is None:
+            return None
+        n_concepts += 1
+        # The previous concept ends where this one's key starts
+        if entries and entries[-1][3] is None:
+            entries[-1][3] = key_start
+        concept = content[key_start:position].decode("utf-8")
+        if (taxonomies is None or taxonomy in taxonomies) and (concepts is None or concept in concepts):
+            entries.append([taxonomy, concept, position + 2, None])
+    # Every concept has exactly one "label" and one "units" key, and nothing else does
+    if not n_concepts == content.count(b'"label":') == content.count(b'"units":'):
+        return None
+    if entries and entries[-1][3] is None:
+        entries[-1][3] = len(content)
+    return [tuple(entry) for entry in entries]
 
-def assign_tags(score_dictionary):
-    assigned_tags ={}
-    for label, tags_dictionary in score_dictionary.items():
-        assigned_tags[label] = {}
-        assigned_tags[label]["company_fact"] = max_value_key(tags_dictionary)
-        assigned_tags[label]["format"] = "us-gaap"
-    return assigned_tags
+
+def parse_company_facts(content, concepts=None, taxonomies=None):
+    """
+    Parses a raw company facts document, keeping only the requested concepts.
+
+    Args:
+        content (bytes): Raw company facts JSON.
+        concepts (iterable): Concepts to keep. Defaults to all.
+        taxonomies (iterable): Taxonomies to keep. Defaults to all.
+
+    Returns:
+        dict: Same layout as the full document, with only the requested facts.
+    """
+    company_facts = company_facts_header(content)
+    company_facts["facts"] = {}
+    for taxonomy, concept, details in iter_company_facts(content, concepts, taxonomies):
+        company_facts["facts"].setdefault(taxonomy, {})[concept] = details
+    return company_facts
+
+
+# ---------- Columnar fact store ------------
+# Company facts are normalized into one long table and stored as Parquet, one partition
+# per company: FACT_STORE_DIR/cik=<10-digit CIK>/facts.parquet. String columns are
+# dictionary-encoded. Each partition also keeps the concept labels in _labels.json;
+# files starting with "_" or "." are ignored by the dataset scanner.
+FACT_STORE_DIR = os.path.join(CACHE_DIR, "facts")
+FACT_STORE_COLUMNS = [
+    "taxonomy", "concept", "unit", "start", "end", "val", "fy", "fp", "form", "accn", "filed", "frame",
+]
+_FACT_STORE_PARTITIONING = ds.partitioning(pa.schema([("cik", pa.string())]), flavor="hive")
+# Every partition is written with the same schema, so a column that is empty for one
+# company is not inferred as null type and dropped when reading the others.
+_fact_string = pa.dictionary(pa.int32(), pa.string())
+_fact_date = pa.timestamp("ns")
+_FACT_FILE_SCHEMA = pa.schema([
+    ("taxonomy", _fact_string),
+    ("concept", _fact_string),
+    ("unit", _fact_string),
+    ("start", _fact_date),
+    ("end", _fact_date),
+    ("val", pa.float64()),
+    ("fy", pa.int64()),
+    ("fp", _fact_string),
+    ("form", _fact_string),
+    ("accn", _fact_string),
+    ("filed", _fact_date),
+    ("frame", _fact_string),
+])
+_FACT_STORE_SCHEMA = pa.schema([("cik", pa.string())] + list(_FACT_FILE_SCHEMA))
+
+
+def _fact_partition_dir(cik):
+    return os.path.join(FACT_STORE_DIR, f"cik={str(int(cik)).zfill(10)}")
+
+
+def _categorical_column(values):
+    """
+    Builds a categorical from a list of hashable values, None becoming NaN.
+    """
+    codes, uniques = pd.factorize(np.array(values, dtype=object))
+    return pd.Categorical.from_codes(codes, categories=uniques)
+
+
+def _date_column(values):
+    """
+    Parses a list of "YYYY-MM-DD" strings (or None) into datetime64, parsing each
+    distinct date only once.
+    """
+    codes, uniques = pd.factorize(np.array(values, dtype=object))
+    dates = pd.to_datetime(uniques, format="%Y-%m-%d").to_numpy()
+    # Missing dates have code -1, which picks the NaT appended at the end
+    return np.append(dates, np.datetime64("NaT", "ns"))[codes]
+
+
+def normalize_company_facts(company_facts):
+    """
+    Flattens a company facts document into one long table.
+
+    Data points are copied field by field into per-column lists, without building a
+    dict per row. Taxonomy, concept and unit are stored once per block of data points
+    and expanded with np.repeat. String columns become categoricals, dates are parsed
+    with a fixed format, val is float64 and fy nullable Int64.
+
+    Args:
+        company_facts (bytes or dict): Raw company facts JSON, or the document as returned
+            by get_facts. Raw JSON is decoded one concept at a time.
+
+    Returns:
+        tuple: DataFrame with FACT_STORE_COLUMNS and a dict of labels
+            {taxonomy: {concept: label}}.
+    """
+    blocks = {"taxonomy": [], "concept": [], "unit": []}
+    lengths = []
+    fields = {column: [] for column in FACT_STORE_COLUMNS[3:]}
+    labels = {}
+    for taxonomy, concept, details in iter_company_facts(company_facts):
+        labels.setdefault(taxonomy, {})[concept] = details.get("label")
+        for unit, items in details["units"].items():
+            blocks["taxonomy"].append(taxonomy)
+            blocks["concept"].append(concept)
+            blocks["unit"].append(unit)
+            lengths.append(len(items))
+            for column, values in fields.items():
+                values.extend([item.get(column) for item in items])
+
+    lengths = np.asarray(lengths, dtype=np.int64)
+    data = {}
+    for column, values in blocks.items():
+        block_column = _categorical_column(values)
+        data[column] = pd.Categorical.from_codes(
+            np.repeat(block_column.codes, lengths), categories=block_column.categories
+        )
+    for column in ("start", "end", "filed"):
+        data[column] = _date_column(fields[column])
+    data["val"] = np.array(fields["val"], dtype="float64")
+    data["fy"] = pd.array(fields["fy"], dtype="Int64")
+    for column in ("fp", "form", "accn", "frame"):
+        data[column] = _categorical_column(fields[column])
+    return pd.DataFrame(data, columns=FACT_STORE_COLUMNS), labels
+
+
+def _write_fact_partition(cik, df, labels):
+    directory = _fact_partition_dir(cik)
+    os.makedirs(directory, exist_ok=True)
+    # Write under ignored names and move into place, so readers never see partial files
+    tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    tmp_facts = os.path.join(directory, f".facts.parquet{tmp_suffix}")
+    tmp_labels = os.path.join(directory, f"._labels.json{tmp_suffix}")
+    pq.write_table(pa.Table.from_pandas(df, schema=_FACT_FILE_SCHEMA, preserve_index=False), tmp_facts)
+    with open(tmp_labels, "w") as f:
+        json.dump(labels, f)
+    os.replace(tmp_labels, os.path.join(directory, "_labels.json"))
+    os.replace(tmp_facts, os.path.join(directory, "facts.parquet"))
+
+
+def write_fact_store(company_facts):
+    """
+    Normalizes a company facts document and replaces the company's partition.
+
+    Args:
+        company_facts (bytes or dict): Raw company facts JSON, or the document as returned
+            by get_facts.
+
+    Returns:
+        str: The company's 10-digit CIK.
+    """
+    if isinstance(company_facts, dict):
+        cik = company_facts["cik"]
+    else:
+        cik = company_facts_header(company_facts)["cik"]
+    cik = str(int(cik)).zfill(10)
+    df, labels = normalize_company_facts(company_facts)
+    _write_fact_partition(cik, df, labels)
+    return cik
+
+
+def ensure_fact_store(ticker, headers=headers, max_age=None):
+    """
+    Makes sure the fact store holds an up-to-date partition for a company.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        headers (dict): Headers for HTTP request.
+        max_age (float): Seconds after which the partition is rebuilt from the company
+            facts API. Defaults to the XBRL cache TTL.
+
+    Returns:
+        str: The company's 10-digit CIK.
+    """
+    return _ensure_fact_partition(cik_matching_ticker(ticker, headers), headers, max_age)
+
+
+def _fact_partition_is_fresh(cik, max_age=None):
+    if max_age is None:
+        max_age = CACHE_TTLS["xbrl"]
+    try:
+        age = time.time() - os.path.getmtime(os.path.join(_fact_partition_dir(cik), "facts.parquet"))
+    except OSError:
+        return False
+    return max_age is None or age < max_age
+
+
+def _ensure_fact_partition(cik, headers=headers, max_age=None, refresh=False):
+    if not refresh and _fact_partition_is_fresh(cik, max_age):
+        return cik
+    url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
+    return write_fact_store(cached_get(url, headers=headers, revalidate=refresh).content)
+
+
+def read_fact_labels(cik):
+    """
+    Returns the concept labels stored with a company's partition.
+
+    Args:
+        cik (int or str): CIK number.
+
+    Returns:
+        dict: {taxonomy: {concept: label}}, empty if the company is not in the store.
+    """
+    try:
+        with open(os.path.join(_fact_partition_dir(cik), "_labels.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def read_fact_store(ciks=None, concepts=None, fys=None, taxonomies=None, forms=None, columns=None):
+    """
+    Reads facts from the store, pushing the filters down to the Parquet scan.
+
+    Args:
+        ciks (list): CIKs to read. Defaults to every company in the store.
+        concepts (list): Concepts to keep.
+        fys (list): Fiscal years to keep.
+        taxonomies (list): Taxonomies to keep, e.g. ["us-gaap"].
+        forms (list): Forms to keep, e.g. ["10-K"].
+        columns (list): Columns to return. Defaults to cik plus FACT_STORE_COLUMNS.
+
+    Returns:
+        DataFrame: Matching facts, in store order within each company.
+    """
+    if columns is None:
+        columns = ["cik"] + FACT_STORE_COLUMNS
+    if ciks is None:
+        if not os.path.isdir(FACT_STORE_DIR):
+            return pd.DataFrame(columns=columns)
+        dataset = ds.dataset(
+            FACT_STORE_DIR, schema=_FACT_STORE_SCHEMA, format="parquet", partitioning=_FACT_STORE_PARTITIONING
+        )
+    else:
+        paths = [os.path.join(_fact_partition_dir(cik), "facts.parquet") for cik in ciks]
+        paths = [path for path in paths if os.path.exists(path)]
+        if not paths:
+            return pd.DataFrame(columns=columns)
+        dataset = ds.dataset(
+            paths,
+            schema=_FACT_STORE_SCHEMA,
+            format="parquet",
+            partitioning=_FACT_STORE_PARTITIONING,
+            partition_base_dir=FACT_STORE_DIR,
+        )
+
+    predicate = None
+    for field, values in (("concept", concepts), ("fy", fys), ("taxonomy", taxonomies), ("form", forms)):
+        if values is not None:
+            condition = ds.field(field).isin(list(values))
+            predicate = condition if predicate is None else predicate & condition
+    table = dataset.to_table(columns=columns, filter=predicate)
+    # fy is the only integer column; keep it nullable as written
+    return table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+
+# ---------- Bulk archive ingestion ------------
+# The SEC publishes every company's facts and submissions nightly as
+# https://www.sec.gov/Archives/edgar/daily-index/xbrl/companyfacts.zip and
+# https://www.sec.gov/Archives/edgar/daily-index/bulkdata/submissions.zip.
+# ingest_bulk_archives reads local copies of them into the same places the per-company
+# functions use: company facts go to the fact store, submissions are seeded into the
+# HTTP cache under their data.sec.gov URL.
+_bulk_member_pattern = re.compile(r"CIK(\d{10})\.json$")
+
+
+def _init_bulk_worker(cache_dir, fact_store_dir):
+    global CACHE_DIR, FACT_STORE_DIR
+    CACHE_DIR = cache_dir
+    FACT_STORE_DIR = fact_store_dir
+
+
+def _ingest_companyfacts_members(zip_path, members):
+    """
+    Writes the fact store partitions of some companyfacts.zip members. Runs in a worker
+    process; each member is decompressed straight from the archive.
+
+    Returns:
+        list: CIKs written.
+    """
+    written = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in members:
+            with archive.open(member) as f:
+                content = f.read()
+            df, labels = normalize_company_facts(content)
+            # Companies without XBRL data have an empty "facts" object
+            if not df.empty:
+                cik = str(int(company_facts_header(content)["cik"])).zfill(10)
+                _write_fact_partition(cik, df, labels)
+                written.append(cik)
+    return written
+
+
+def _ingest_submissions_members(zip_path, members, ingested_at):
+    """
+    Seeds the HTTP cache with some submissions.zip members. Runs in a worker process.
+
+    Returns:
+        list: CIKs seeded.
+    """
+    seeded = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in members:
+            cik = _bulk_member_pattern.search(member).group(1)
+            url = f"https://data.sec.gov/submissions/CIK{cik}.json"
+            with archive.open(member) as f:
+                body = f.read()
+            # The entry counts as fetched when the SEC built the archive
+            built_at = time.mktime(archive.getinfo(member).date_time + (0, 0, -1))
+            meta = {
+                "url": url,
+                "status": 200,
+                "headers": {"Content-Type": "application/json"},
+                "fetched_at": min(built_at, ingested_at),
+                "cache_class": "bulk_submissions",
+            }
+            _write_cache_entry(_cache_path(url), meta, body)
+            seeded.append(cik)
+    return seeded
+
+
+def _bulk_members(zip_path, ciks):
+    with zipfile.ZipFile(zip_path) as archive:
+        members = []
+        for member in archive.namelist():
+            # Skips the -submissions-001.json overflow files of long filing histories
+            match = _bulk_member_pattern.search(member)
+            if match and (ciks is None or match.group(1) in ciks):
+                members.append(member)
+    return members
+
+
+def ingest_bulk_archives(companyfacts_zip=None, submissions_zip=None, ciks=None, max_workers=None,
+                         chunk_size=100):
+    """
+    Loads the SEC bulk companyfacts.zip and/or submissions.zip archives from disk.
+
+    Members are streamed out of the archives without extracting them and parsed in
+    worker processes. Company facts end up in the fact store, where facts_DF and
+    generate_main_df read them. Submissions are seeded into the HTTP cache, where
+    get_submission_data_for_ticker finds them; they count as fetched when the archive
+    was built and are served without requests until CACHE_TTLS["bulk_submissions"] has
+    passed. They hold no validators, so they are then downloaded again.
+
+    Args:
+        companyfacts_zip (str): Path of companyfacts.zip.
+        submissions_zip (str): Path of submissions.zip.
+        ciks (iterable): CIKs to ingest, e.g. the company table's. Defaults to all.
+        max_workers (int): Number of worker processes. Defaults to the number of CPUs.
+        chunk_size (int): Members handed to a worker at a time.
+
+    Returns:
+        dict: {"companyfacts": [CIKs written], "submissions": [CIKs seeded]}.
+    """
+    if ciks is not None:
+        ciks = {str(int(cik)).zfill(10) for cik in ciks}
+    ingested = {"companyfacts": [], "submissions": []}
+    jobs = []
+    if companyfacts_zip is not None:
+        jobs.append(("companyfacts", companyfacts_zip, _ingest_companyfacts_members, ()))
+    if submissions_zip is not None:
+        jobs.append(("submissions", submissions_zip, _ingest_submissions_members, (time.time(),)))
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_bulk_worker,
+        initargs=(CACHE_DIR, FACT_STORE_DIR),
+    ) as executor:
+        futures = []
+        for kind, zip_path, worker, extra_args in jobs:
+            members = _bulk_members(zip_path, ciks)
+            for i in range(0, len(members), chunk_size):
+                chunk = members[i:i + chunk_size]
+                futures.append((kind, executor.submit(worker, zip_path, chunk, *extra_args)))
+        for kind, future in futures:
+            ingested[kind].extend(future.result())
+    return ingested
+
+
+# ---------- Incremental refresh ------------
+# REFRESH_STATE_PATH keeps, per CIK, the date of the newest periodic filings seen by
+# refresh_companies and every accession number filed on that date, so a daily refresh only
+# re-pulls the companies that filed since the previous run.
+REFRESH_STATE_PATH = os.path.join(CACHE_DIR, "refresh_state.json")
+REFRESH_FORMS = ("10-K", "10-Q")
+
+
+def _read_refresh_state():
+    try:
+        with open(REFRESH_STATE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_refresh_state(state):
+    tmp_path = f"{REFRESH_STATE_PATH}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(REFRESH_STATE_PATH), exist_ok=True)
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, REFRESH_STATE_PATH)
+
+
+def daily_index_filings(date, headers=headers):
+    """
+    Lists the filings of one day from the EDGAR daily master index.
+
+    Args:
+        date (date-like): Filing date.
+        headers (dict): Headers for HTTP request.
+
+    Returns:
+        DataFrame: Columns cik (10 digits), form, filingDate and accessionNumber. Empty
+            for days without an index, such as weekends.
+    """
+    date = pd.Timestamp(date)
+    url = (
+        f"https://www.sec.gov/Archives/edgar/daily-index/{date.year}/QTR{date.quarter}/"
+        f"master.{date:%Y%m%d}.idx"
+    )
+    response = cached_get(url, headers=headers)
+    if response.status_code in (403, 404):
+        return pd.DataFrame(columns=["cik", "form", "filingDate", "accessionNumber"])
+    response.raise_for_status()
+
+    rows = []
+    lines = response.content.decode("latin-1").splitlines()
+    # Entries follow a line of dashes under the "CIK|Company Name|..." header
+    start = next((i + 1 for i, line in enumerate(lines) if line.startswith("---")), len(lines))
+    for line in lines[start:]:
+        fields = line.split("|")
+        if len(fields) != 5:
+            continue
+        cik, _, form, filed, file_name = fields
+        rows.append({
+            "cik": cik.zfill(10),
+            "form": form,
+            "filingDate": f"{filed[:4]}-{filed[4:6]}-{filed[6:8]}",
+            "accessionNumber": file_name.rsplit("/", 1)[-1].removesuffix(".txt"),
+        })
+    return pd.DataFrame(rows, columns=["cik", "form", "filingDate", "accessionNumber"])
+
+
+def _seen_accessions(last_seen):
+    # States written before accessionNumbers was kept hold the newest accession only
+    if last_seen is None:
+        return set()
+    return set(last_seen.get("accessionNumbers", [last_seen.get("accessionNumber")]))
+
+
+def _new_periodic_filings(submissions, last_seen):
+    recent = submissions["filings"]["recent"]
+    seen = _seen_accessions(last_seen)
+    new_filings = []
+    for accession_number, form, filed in zip(recent["accessionNumber"], recent["form"], recent["filingDate"]):
+        if form not in REFRESH_FORMS:
+            continue
+        if last_seen is None or filed > last_seen["filingDate"] or (
+            filed == last_seen["filingDate"] and accession_number not in seen
+        ):
+            new_filings.append({"accessionNumber": accession_number, "form": form, "filingDate": filed})
+    return new_filings
+
+
+def _next_refresh_state(last_seen, new_filings):
+    latest = max(filing["filingDate"] for filing in new_filings)
+    seen = _seen_accessions(last_seen) if last_seen and last_seen["filingDate"] == latest else set()
+    seen.update(filing["accessionNumber"] for filing in new_filings if filing["filingDate"] == latest)
+    return {"filingDate": latest, "accessionNumbers": sorted(seen)}
+
+
+def refresh_companies(tickers, headers=headers, since=None, max_workers=FETCH_WORKERS):
+    """
+    Re-pulls the companies that filed a 10-K or 10-Q since the previous refresh.
+
+    Each company's submissions are revalidated with a conditional GET, which is a cheap
+    304 for companies without new filings. With since, the EDGAR daily indexes from that
+    date to today are read instead, and only the companies they list with a 10-K or 10-Q,
+    plus those never refreshed before, are looked at. For companies with new filings, the fact store partition is rebuilt,
+    the shared handle is dropped and, after a new 10-K, tags are assigned from its
+    linkbases. Companies refreshed for the first time count as having new filings.
+    Statements are not kept locally; pass the returned accession numbers to
+    get_statements and add the frames to a StatementPanel.
+
+    Args:
+        tickers (list): Stock ticker symbols of the universe.
+        headers (dict): Headers for HTTP request.
+        since (date-like): First day of daily indexes to read.
+        max_workers (int): Number of companies checked concurrently.
+
+    Returns:
+        dict: ticker -> list of new filings ({"accessionNumber", "form", "filingDate"}),
+            for the companies that have any.
+    """
+    ciks = {ticker: cik for ticker, cik in ciks_for_tickers(tickers, headers).items() if cik is not None}
+    state = _read_refresh_state()
+    if since is not None:
+        listed = set()
+        for date in pd.date_range(since, pd.Timestamp.today().normalize(), freq="B"):
+            filings = daily_index_filings(date, headers)
+            listed.update(filings.loc[filings["form"].isin(REFRESH_FORMS), "cik"])
+        # Companies without a baseline yet are refreshed whether they filed or not
+        ciks = {ticker: cik for ticker, cik in ciks.items() if cik in listed or cik not in state}
+
+    def refresh(ticker, cik):
+        url = f"https://data.sec.gov/submissions/CIK{cik}.json"
+        submissions = cached_get(url, headers=headers, revalidate=True).json()
+        new_filings = _new_periodic_filings(submissions, state.get(cik))
+        if new_filings:
+            _ensure_fact_partition(cik, headers, refresh=True)
+            clear_company_handles([cik])
+            if any(filing["form"] == "10-K" for filing in new_filings):
+                get_company(ticker, cik=cik, headers=headers).tags
+        return new_filings
+
+    refreshed = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {ticker: executor.submit(refresh, ticker, cik) for ticker, cik in ciks.items()}
+        for ticker, future in futures.items():
+            try:
+                new_filings = future.result()
+            except Exception as e:
+                logging.error(f"Could not refresh {ticker}: {e}")
+                continue
+            if new_filings:
+                refreshed[ticker] = new_filings
+                state[ciks[ticker]] = _next_refresh_state(state.get(ciks[ticker]), new_filings)
+    _write_refresh_state(state)
+    return refreshed
+
+
+def _read_us_gaap_facts(cik):
+    """
+    Reads a company's us-gaap facts from the fact store in the facts_DF layout.
+    """
+    df = read_fact_store(
+        [cik], taxonomies=["us-gaap"], columns=["concept", "end", "val", "accn", "fy", "fp", "form", "filed", "frame", "start"]
+    )
+    df = df.rename(columns={"concept": "fact"})
+    # Drop duplicates and set index
+    df = df.drop_duplicates(subset=["fact", "end", "val"])
+    # Categories become plain strings; rows share one string object per category
+    for column in ("fact", "accn", "fp", "form", "frame"):
+        df[column] = df[column].astype(object)
+    codes, dates = pd.factorize(df["filed"])
+    df["filed"] = pd.Index(dates.strftime("%Y-%m-%d"), dtype=object).take(codes, allow_fill=True).to_numpy()
+    df.set_index("end", inplace=True)
+    return df
+
+
+def facts_DF(ticker, headers=headers):
+    """
+    Converts company facts into a DataFrame.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        headers (dict): Headers for HTTP request.
+
+    Returns:
+        tuple: DataFrame of facts and a dictionary of labels.
+    """
+    company = get_company(ticker, headers=headers)
+    return company.facts.copy(), dict(company.labels)
+
+# ---------- Label scoring ------------
+# A target label is scored against a concept's labels with fuzzywuzzy's token_sort_ratio,
+# WRatio and token_set_ratio, averaged. The two token scores are computed as whole
+# matrices with rapidfuzz's process.cdist on all cores, rounded to integers like
+# fuzzywuzzy's, which they then equal. rapidfuzz's WRatio does not match fuzzywuzzy's, so
+# that score comes from fuzzywuzzy, pair by pair. The last LABEL_PAIR_SCORE_LIMIT pair
+# scores are remembered, since the same standard labels come up for company after company.
+_label_matrix_scorers = (rf_fuzz.token_sort_ratio, rf_fuzz.token_set_ratio)
+LABEL_PAIR_SCORE_LIMIT = 200_000
+_label_pair_scores = collections.OrderedDict()
+_label_pair_scores_lock = threading.Lock()
+
+
+def _fuzzy_process(text):
+    # fuzzywuzzy's full_process: drop non-ASCII characters, then lowercase and strip punctuation
+    return rf_utils.default_process(text.encode("ascii", "ignore").decode("ascii"))
+
+
+def label_similarity_matrix(targets, candidates, workers=-1):
+    """
+    Scores every target label against every candidate label.
+
+    Args:
+        targets (list): Labels to assign.
+        candidates (list): Labels found in the company's label linkbase.
+        workers (int): Cores used by rapidfuzz; -1 means all.
+
+    Returns:
+        ndarray: Composite scores, shape (len(targets), len(candidates)).
+    """
+    unique_targets = list(dict.fromkeys(targets))
+    scores = {}
+    with _label_pair_scores_lock:
+        for target in unique_targets:
+            for candidate in candidates:
+                score = _label_pair_scores.get((target, candidate))
+                if score is not None:
+                    _label_pair_scores.move_to_end((target, candidate))
+                    scores[(target, candidate)] = score
+    unscored = list(dict.fromkeys(
+        c for c in candidates if any((t, c) not in scores for t in unique_targets)
+    ))
+    if unique_targets and unscored:
+        matrix = sum(
+            np.rint(rf_process.cdist(
+                unique_targets, unscored, scorer=scorer, processor=_fuzzy_process,
+                workers=workers, dtype=np.float64,
+            ))
+            for scorer in _label_matrix_scorers
+        )
+        new_scores = {}
+        for i, target in enumerate(unique_targets):
+            for j, candidate in enumerate(unscored):
+                if (target, candidate) not in scores:
+                    new_scores[(target, candidate)] = (matrix[i, j] + fuzz.WRatio(target, candidate)) / 3
+        scores.update(new_scores)
+        with _label_pair_scores_lock:
+            _label_pair_scores.update(new_scores)
+            while len(_label_pair_scores) > LABEL_PAIR_SCORE_LIMIT:
+                _label_pair_scores.popitem(last=False)
+
+    result = np.empty((len(targets), len(candidates)))
+    for i, target in enumerate(targets):
+        for j, candidate in enumerate(candidates):
+            result[i, j] = scores[(target, candidate)]
+    return result
 
 
 def best_label_score_tags(actual_label, list_of_labels_used):
-    scores = []
-    for labels in list_of_labels_used:
-        score1 = fuzz.token_sort_ratio(actual_label, labels)
-        score2 = fuzz.WRatio(actual_label, labels)
-        score3 = fuzz.token_set_ratio(actual_label, labels)
-        score = (score1 + score2 + score3) / 3
-        scores.append(score)
-    return max(scores)
+    return float(label_similarity_matrix([actual_label], list(list_of_labels_used)).max())
+
+
+def score_fact_label_hierarchy(company_labels_to_assign, fact_label_hierarchy):
+    """
+    Scores each label to assign against the labels of every candidate tag, with one
+    similarity matrix per main fact.
+
+    Args:
+        company_labels_to_assign (dict): Main fact -> labels to assign.
+        fact_label_hierarchy (dict): Main fact -> {candidate tag: list of its labels}.
+
+    Returns:
+        dict: Label to assign -> {candidate tag: best composite score}.
+    """
+    scores = {}
+    for main_fact, actual_labels in company_labels_to_assign.items():
+        hierarchy = fact_label_hierarchy[main_fact]
+        candidates = []
+        spans = {}
+        for tag, list_of_labels in hierarchy.items():
+            start = len(candidates)
+            candidates.extend(list_of_labels)
+            spans[tag] = (start, len(candidates))
+        matrix = label_similarity_matrix(actual_labels, candidates)
+        for i, actual_label in enumerate(actual_labels):
+            scores[actual_label] = {
+                tag: float(matrix[i, start:stop].max()) for tag, (start, stop) in spans.items()
+            }
+    return scores
 
 
 def max_value_key(tags_dictionary):
@@ -300,7 +1755,257 @@ def assign_tags(score_dictionary):
     return assigned_tags
 
 
+# ---------- Linkbase parsing ------------
+# Label and calculation linkbases are streamed with lxml's iterparse. Only label and
+# calculationArc elements are looked at, and each one is freed as soon as it has been
+# read, so memory stays flat however large the linkbase is.
+_XLINK_LABEL = "{http://www.w3.org/1999/xlink}label"
+_XLINK_FROM = "{http://www.w3.org/1999/xlink}from"
+_XLINK_TO = "{http://www.w3.org/1999/xlink}to"
+_linkbase_us_gaap_pattern = re.compile(r'us-gaap_(.*?)(?:_.*?)?$')
+_linkbase_common_pattern = re.compile(r'(?<=_)(.*?)(?=_)')
+
+
+def _linkbase_fact_name(xlink_value):
+    """
+    Extracts the concept name from an xlink:label/from/to value such as
+    'lab_us-gaap_Assets_7c1e...' or 'loc_us-gaap_Assets'.
+    """
+    match = _linkbase_us_gaap_pattern.search(xlink_value)
+    if match is not None:
+        return match.group(1)
+    match = _linkbase_common_pattern.search(xlink_value)
+    if match is not None:
+        return match.group(1)
+    return xlink_value
+
+
+def _iter_linkbase_elements(content, local_name):
+    """
+    Yields the elements with the given local name, in any namespace, freeing each one
+    (and everything before it) once the caller is done with it.
+    """
+    context = etree.iterparse(io.BytesIO(content), events=("end",), tag=f"{{*}}{local_name}")
+    for _, element in context:
+        yield element
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def parse_label_linkbase(content):
+    """
+    Reads the labels of a label linkbase (_lab.xml).
+
+    Args:
+        content (bytes): Raw linkbase XML.
+
+    Returns:
+        dict: Concept name -> list of its labels, in document order.
+    """
+    lab_tags = {}
+    for element in _iter_linkbase_elements(content, "label"):
+        xlink_label = element.get(_XLINK_LABEL)
+        if xlink_label is None:
+            continue
+        label_tag = _linkbase_fact_name(xlink_label)
+        label = "".join(element.itertext())
+        if label_tag in lab_tags:
+            lab_tags[label_tag].append(label)
+        else:
+            lab_tags[label_tag] = [label]
+    return lab_tags
+
+
+def parse_calculation_linkbase(content):
+    """
+    Reads the arcs of a calculation linkbase (_cal.xml).
+
+    Args:
+        content (bytes): Raw linkbase XML.
+
+    Returns:
+        dict: Parent concept name -> list of its child concept names, in document order.
+    """
+    cal_tags = {}
+    for element in _iter_linkbase_elements(content, "calculationArc"):
+        from_attribute = element.get(_XLINK_FROM)
+        to_attribute = element.get(_XLINK_TO)
+        if from_attribute is None or to_attribute is None:
+            continue
+        main_fact = _linkbase_fact_name(from_attribute)
+        under_fact = _linkbase_fact_name(to_attribute)
+        if main_fact in cal_tags:
+            # If it is, append the subsidiary fact to the list of values
+            cal_tags[main_fact].append(under_fact)
+        else:
+            # If not, create a new entry with the main fact as key and a list containing the subsidiary fact as value
+            cal_tags[main_fact] = [under_fact]
+    return cal_tags
+
+
+class CalculationGraph:
+    """
+    Parent and child indexes over the arcs of a calculation linkbase.
+
+    Children keep their document order, and membership tests and parent lookups are
+    dictionary and set lookups, so resolving any number of concepts stays linear in the
+    size of the linkbase. Transitive descendants are computed once per concept.
+
+    Args:
+        cal_tags (dict): Parent concept name -> list of child concept names, as returned by
+            parse_calculation_linkbase.
+    """
+
+    def __init__(self, cal_tags):
+        self._children = {}
+        self._child_sets = {}
+        self._parents = {}
+        for parent, children in cal_tags.items():
+            self._children[parent] = list(dict.fromkeys(children))
+            self._child_sets[parent] = set(self._children[parent])
+            for child in self._children[parent]:
+                self._parents.setdefault(child, []).append(parent)
+        self._descendants = {}
+
+    def __contains__(self, concept):
+        return concept in self._children or concept in self._parents
+
+    def children(self, concept):
+        """
+        Returns the direct children of a concept, empty if it has none.
+        """
+        return self._children.get(concept, [])
+
+    def parents(self, concept):
+        """
+        Returns the concepts a concept rolls up into, empty if it has none.
+        """
+        return self._parents.get(concept, [])
+
+    def has_child(self, parent, child):
+        return child in self._child_sets.get(parent, ())
+
+    def descendants(self, concept):
+        """
+        Returns every concept that rolls up into a concept, at any depth.
+
+        Args:
+            concept (str): Concept name.
+
+        Returns:
+            list: Descendants in depth-first document order, each listed once.
+        """
+        if concept not in self._descendants:
+            seen = {concept}
+            result = []
+            stack = list(reversed(self.children(concept)))
+            while stack:
+                child = stack.pop()
+                if child in seen:
+                    continue
+                seen.add(child)
+                result.append(child)
+                stack.extend(reversed(self.children(child)))
+            self._descendants[concept] = result
+        return self._descendants[concept]
+
+    def rollup(self, concept):
+        """
+        Returns the concept whose children are the candidate tags for a concept.
+
+        That is the concept itself when it has children, otherwise the first concept it
+        rolls up into, or None when it is not in the linkbase at all.
+        """
+        if concept in self._children:
+            return concept
+        parents = self.parents(concept)
+        return parents[0] if parents else None
+
+
+# ---------- Tag assignment cache ------------
+# Tag assignments depend only on the linkbases of the latest 10-K, so they are stored per
+# filing: TAG_STORE_DIR/<10-digit CIK>/<accession number>.json. A newer 10-K has a new
+# accession number and is computed afresh. Bump TAG_STORE_VERSION when the labels to
+# assign or the scoring change, so older assignments are not reused.
+TAG_STORE_DIR = os.path.join(CACHE_DIR, "tags")
+TAG_STORE_VERSION = 2
+
+
+def _tag_assignment_path(cik, accession_number):
+    return os.path.join(TAG_STORE_DIR, str(int(cik)).zfill(10), f"{accession_number}.json")
+
+
+def _read_tag_assignment(cik, accession_number):
+    try:
+        with open(_tag_assignment_path(cik, accession_number)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("version") != TAG_STORE_VERSION:
+        return None
+    return entry["tags"]
+
+
+def _write_tag_assignment(cik, accession_number, tags):
+    path = _tag_assignment_path(cik, accession_number)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump({"version": TAG_STORE_VERSION, "tags": tags}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"Could not write tag assignment {path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def precompute_tag_assignments(tickers, headers=headers, max_workers=FETCH_WORKERS):
+    """
+    Computes and stores the tag assignments of many companies ahead of time.
+
+    Companies whose latest 10-K already has a stored assignment are not downloaded again.
+    Failures are logged and the company is left out of the result.
+
+    Args:
+        tickers (list): Stock ticker symbols.
+        headers (dict): Headers for HTTP request.
+        max_workers (int): Number of companies processed concurrently.
+
+    Returns:
+        dict: ticker -> assigned tags, as in get_label_calc_tags.
+    """
+    def assigned_tags(ticker):
+        return get_company(ticker, headers=headers).tags["assigned_tags"]
+
+    assignments = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {ticker: executor.submit(assigned_tags, ticker) for ticker in tickers}
+        for ticker, future in futures.items():
+            try:
+                assignments[ticker] = future.result()
+            except Exception as e:
+                logging.error(f"Could not assign tags for {ticker}: {e}")
+    return assignments
+
+
 def get_label_calc_tags(ticker):
+    return copy.deepcopy(get_company(ticker).tags)
+
+
+def _compute_label_calc_tags(company):
+    accession_number = company.filtered_filings(just_accession_numbers=True).iloc[0]
+    tags = _read_tag_assignment(company.cik, accession_number)
+    if tags is None:
+        tags = _label_calc_tags_for_filing(company.cik, accession_number, company.headers)
+        _write_tag_assignment(company.cik, accession_number, tags)
+    return tags
+
+
+def _label_calc_tags_for_filing(cik, accession_number, headers=headers):
     company_labels_to_assign = {"AssetsCurrent": ["Inventories",
                                                   "Accounts Receivables net"],
                                 "Assets": ["Total current assets",
@@ -315,265 +2020,662 @@ def get_label_calc_tags(ticker):
                                     "interest expenses"],
                                 }
 
-    main_facts = company_labels_to_assign.keys()
+    main_facts = company_labels_to_assign.keys()
+
+    url_lab = ""
+    url_cal = ""
+    url_xsd = ""
+    cik = str(int(cik))
+    accession_number_with_nodash = accession_number.replace("-", "")
+    int_url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_number_with_nodash}/{accession_number}-index.html"
+    int_content = cached_get(int_url, headers=headers).content
+    int_soup = BeautifulSoup(int_content, 'xml')
+    int_table = int_soup.find('table', summary="Data Files")
+    for link in int_table.find_all('a'):
+        if link.text.endswith('_lab.xml'):
+            url_lab = link.get("href")
+        if link.text.endswith('_cal.xml'):
+            url_cal = link.get("href")
+        if link.text.endswith(".xsd"):
+            url_xsd = link.get("href")
+    if url_lab == "":
+        url_lab = url_xsd
+    if url_cal == "":
+        url_cal = url_xsd
+
+    # ---------- Label Tags ------------
+    lab_url = f"https://sec.gov{url_lab}"
+    lab_content = cached_get(lab_url, headers=headers).content
+    lab_tags = parse_label_linkbase(lab_content)
+
+    # ---------- Calc Tags ------------
+    calc_url = f"https://sec.gov{url_cal}"
+    calc_content = cached_get(calc_url, headers=headers).content
+    cal_tags = parse_calculation_linkbase(calc_content)
+
+    # Initialize an empty dictionary to hold the hierarchy
+    fact_label_hierarchy = {}
+
+    calculation_graph = CalculationGraph(cal_tags)
+
+    # Iterate through each reference_main_fact in the filtered main_facts set
+    for reference_main_fact in main_facts:
+        # Initialize a nested dictionary for each reference_main_fact
+        fact_label_hierarchy[reference_main_fact] = {}
+        # Facts missing from the calc linkbase keep an empty hierarchy and get no tag
+        mf = calculation_graph.rollup(reference_main_fact)
+        for tag_name in calculation_graph.children(mf):
+            fact_label_hierarchy[reference_main_fact][tag_name] = lab_tags.get(tag_name," ")
+
+    scores = score_fact_label_hierarchy(company_labels_to_assign, fact_label_hierarchy)
+
+    assigned_tags = assign_tags(scores)
+
+    order = ["Inventories",
+             "Accounts Receivables net",
+             "Total current assets",
+             "Property and equipment, net",
+             "Accounts payable",
+             "Current portion of long-term debt",
+             "Total current liabilities",
+             "Long-term debt, excluding current portion",
+             "Total current liabilities",
+             "Long-term debt, excluding current portion",
+             "interest expenses"]
+
+    # Custom sorting function
+    sorted_dict = {key: assigned_tags[key] for key in order if key in assigned_tags}
+    return {"assigned_tags": sorted_dict, "scores": scores, "cal_tags": cal_tags, "lab_tags": lab_tags,
+            "fact_label_hierarchy": fact_label_hierarchy}
+
+
+def _annual_pivot(accession_nums, df, label_dict):
+    # Filter data for 10-K filings
+    ten_k = df[df["accn"].isin(accession_nums)]
+    ten_k = ten_k[ten_k.index.isin(accession_nums.index)]
+    # Pivot and format the data
+    pivot = ten_k.pivot_table(values="val", columns="fact", index="end")
+    pivot.rename(columns=label_dict, inplace=True)
+    return pivot.T
+
+
+def _quarterly_pivot(accession_nums, df, label_dict):
+    # Filter data for 10-Q filings
+    ten_q = df[df["accn"].isin(accession_nums)]
+    ten_q = ten_q[ten_q.index.isin(accession_nums.index)].reset_index(drop=False)
+    # Remove duplicate entries
+    ten_q = ten_q.drop_duplicates(subset=["fact", "end"], keep="last")
+    # Pivot and format the data
+    pivot = ten_q.pivot_table(values="val", columns="fact", index="end")
+    pivot.rename(columns=label_dict, inplace=True)
+    return pivot.T
+
+
+def annual_facts(ticker, headers=headers):
+    """
+    Fetches and processes annual (10-K) financial facts for a given ticker.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        headers (dict): Headers for HTTP request.
+
+    Returns:
+        DataFrame: Transposed pivot table of annual financial facts.
+    """
+    return get_company(ticker, headers=headers).annual.copy()
+
+
+def quarterly_facts(ticker, headers=headers):
+    """
+    Fetches and processes quarterly (10-Q) financial facts for a given ticker.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        headers (dict): Headers for HTTP request.
+
+    Returns:
+        DataFrame: Transposed pivot table of quarterly financial facts.
+    """
+    return get_company(ticker, headers=headers).quarterly.copy()
+
+# Facts reported for every company by generate_main_df, before the company-specific
+# tags found by get_label_calc_tags are added
+standard_company_facts = {
+    "Total assets": {"company_fact": "Assets", "format": "us-gaap"},
+    "Total liabilities": {"company_fact": "Liabilities", "format": "us-gaap"},
+    "Retained earnings": {"company_fact": "RetainedEarningsAccumulatedDeficit", "format": "us-gaap"},
+    "Operating Income": {"company_fact": "OperatingIncomeLoss", "format": "us-gaap"},
+    "Total stockholders' equity": {
+        "company_fact": ["StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest",
+                         "StockholdersEquity"], "format": "us-gaap"},
+    "Net income attributable to the shareholders": {"company_fact": "NetIncomeLoss", "format": "us-gaap"},
+    "Net income per share": {"company_fact": "EarningsPerShareBasic", "format": "us-gaap"},
+    "Dividend per share": {"company_fact": "CommonStockDividendsPerShareDeclared", "format": "us-gaap"},
+    "number of share outstanding": {"company_fact": "CommonStockSharesOutstanding", "format": "us-gaap"}
+}
+
+def _tag_alternatives(tag):
+    """
+    Returns the tags to try for a fact, in order: the tag itself, or its list of
+    alternatives. "No tags" gives an empty list.
+    """
+    tags = tag if isinstance(tag, list) else [tag]
+    return [t for t in tags if isinstance(t, str) and t != "No tags"]
+
+
+def _fiscal_year_values(facts, fys):
+    """
+    Finds the value of one concept for each fiscal year.
+
+    Args:
+        facts (DataFrame): 10-K rows of the concept, in fact store order.
+        fys (list): Fiscal years wanted.
+
+    Returns:
+        ndarray: float64 values aligned with fys. Only the first unit the concept is
+            reported in is used, the last entry of a fiscal year wins, and years without
+            one are NaN.
+    """
+    facts = facts[facts["unit"] == facts["unit"].iat[0]]
+    last = facts.drop_duplicates("fy", keep="last").set_index("fy")["val"]
+    return last.reindex(fys).to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _main_df_company_facts(company_facts_update):
+    """
+    Returns standard_company_facts followed by a company's specific tags, which replace
+    standard facts of the same name.
+    """
+    company_facts = dict(standard_company_facts)
+    company_facts.update(company_facts_update)
+    return company_facts
+
+
+def _main_df_frame(ticker, fact_names, values, fys):
+    """
+    Builds one company's generate_main_df rows from a (fact, fiscal year) array of values.
+
+    Returns:
+        DataFrame: Columns Ticker, Fact, Value (nullable Float64, <NA> for NaN) and FY.
+    """
+    return pd.DataFrame(
+        {
+            "Ticker": ticker,
+            "Fact": np.repeat(fact_names, len(fys)),
+            "Value": pd.array(values.ravel(), dtype="Float64"),
+            "FY": np.tile(np.asarray(fys, dtype="int64"), len(fact_names)),
+        }
+    )
+
+
+def _main_df_facts(cik, company_facts, fys, headers=headers):
+    """
+    Reads the 10-K facts of every tag that can fill company_facts, through read_facts.
+
+    Args:
+        cik (str): The company's CIK.
+        company_facts (dict): Facts as in standard_company_facts.
+        fys (list): Fiscal years to read.
+        headers (dict): Headers for HTTP request.
+
+    Returns:
+        dict: (taxonomy, concept) -> facts of the concepts the company reports.
+    """
+    concepts = {}
+    for tag_details in company_facts.values():
+        for tag in _tag_alternatives(tag_details['company_fact']):
+            concepts.setdefault(tag_details['format'], {})[tag] = None
+    grouped = {}
+    for taxonomy, taxonomy_concepts in concepts.items():
+        facts = read_facts([cik], taxonomy_concepts, fys, taxonomy, headers)
+        facts = facts[facts["form"] == "10-K"]
+        for concept, group in facts.groupby("concept", observed=True, sort=False):
+            grouped[(taxonomy, concept)] = group
+    return grouped
+
+
+def _company_main_df(ticker, cik, fys, company_facts_update, standard_facts=None, headers=headers):
+    """
+    Builds the generate_main_df rows for one company.
+
+    Facts are read with read_facts, which takes them from the fact store or lets
+    plan_fact_query pick the cheapest SEC endpoint. Of a list of alternative tags, the
+    first one with 10-K values in fys is used.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        cik (str): The company's CIK.
+        fys (list): Fiscal years to report.
+        company_facts_update (dict): Company-specific tags from get_label_calc_tags.
+        standard_facts (dict): _main_df_facts of standard_company_facts, if already read.
+        headers (dict): Headers for HTTP request.
+
+    Returns:
+        DataFrame: Columns Ticker, Fact, Value (nullable Float64) and FY.
+    """
+    company_facts = _main_df_company_facts(company_facts_update)
+    fact_names = list(company_facts)
+    if standard_facts is None:
+        standard_facts = _main_df_facts(cik, standard_company_facts, fys, headers)
+    grouped = dict(standard_facts)
+    grouped.update(_main_df_facts(cik, company_facts_update, fys, headers))
+
+    values = np.full((len(fact_names), len(fys)), np.nan)
+    for row, fact_name in enumerate(fact_names):
+        tag_details = company_facts[fact_name]
+        for tag in _tag_alternatives(tag_details['company_fact']):
+            group = grouped.get((tag_details['format'], tag))
+            if group is not None:
+                values[row] = _fiscal_year_values(group, fys)
+                break
+
+    return _main_df_frame(ticker, fact_names, values, fys)
+
+
+def iter_main_df(fys, selected_tickers, max_workers=FETCH_WORKERS, cancel_event=None, heartbeat=None):
+    """
+    Yields the generate_main_df rows of each company as soon as they are ready.
+
+    Fetches run concurrently as in generate_main_df, so the first company arrives after
+    about one company's latency. Closing the generator, or setting cancel_event, cancels
+    the fetches that have not started yet. With heartbeat, (None, None) is yielded
+    whenever that many seconds pass without a company, so a caller such as a Streamlit
+    page gets control back regularly and can stop while fetches are slow.
+
+    Args:
+        fys (list): Fiscal years to report.
+        selected_tickers (list): Stock ticker symbols.
+        max_workers (int): Number of fetch threads.
+        cancel_event (threading.Event): Stops the iteration once set.
+        heartbeat (float): Seconds between (None, None) ticks. Defaults to no ticks.
+
+    Yields:
+        tuple: (ticker, DataFrame), in completion order. The DataFrame has the columns
+            of generate_main_df.
+    """
+    results = _iter_main_df(fys, selected_tickers, max_workers, cancel_event, heartbeat)
+    try:
+        for i, df in results:
+            yield (None, None) if i is None else (selected_tickers[i], df)
+    finally:
+        # Shuts the fetch threads down now rather than when results is collected
+        results.close()
+
+
+def _iter_main_df(fys, selected_tickers, max_workers=FETCH_WORKERS, cancel_event=None, heartbeat=None):
+    companies = [get_company(ticker) for ticker in selected_tickers]
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        # Submitted company by company, so the first companies finish first. The standard
+        # facts are read while the tags are assigned; the assigned tags' facts are then
+        # usually in the fact store already.
+        facts_futures, tags_futures = [], []
+        for company in companies:
+            facts_futures.append(executor.submit(
+                _main_df_facts, company.cik, standard_company_facts, fys, company.headers
+            ))
+            tags_futures.append(executor.submit(getattr, company, "tags"))
+        owners = {future: i for futures in (facts_futures, tags_futures) for i, future in enumerate(futures)}
+        # Each company is ready once both its facts and its tags futures are done
+        remaining = [2] * len(companies)
+        pending = set(owners)
+        last_yield = time.monotonic()
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = owners[future]
+                remaining[i] -= 1
+                if remaining[i]:
+                    continue
+                yield i, _company_main_df(
+                    selected_tickers[i], companies[i].cik, fys,
+                    tags_futures[i].result()['assigned_tags'], facts_futures[i].result(), companies[i].headers,
+                )
+                last_yield = time.monotonic()
+            if heartbeat is not None and time.monotonic() - last_yield >= heartbeat:
+                yield None, None
+                last_yield = time.monotonic()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def generate_main_df(fys, selected_tickers, max_workers=FETCH_WORKERS):
+    """
+    Builds a long table of standard and company-specific facts for several companies.
+
+    The company facts and the linkbase-based tag assignment of every ticker are fetched
+    concurrently on a thread pool, so the run takes about as long as the slowest ticker.
+    Facts are read through read_facts, so plan_fact_query picks how companies missing
+    from the fact store are fetched. Rows come out in the order of selected_tickers.
+    See iter_main_df to get each company's rows as soon as they are ready.
+
+    Args:
+        fys (list): Fiscal years to report.
+        selected_tickers (list): Stock ticker symbols.
+        max_workers (int): Number of fetch threads.
+
+    Returns:
+        DataFrame: Columns Ticker, Fact, Value and FY. Value is a nullable Float64
+            column with <NA> where a company did not report a fact for a year.
+    """
+    if not selected_tickers:
+        return pd.DataFrame()
+    company_dfs = dict(_iter_main_df(fys, selected_tickers, max_workers))
+    return pd.concat([company_dfs[i] for i in range(len(selected_tickers))], ignore_index=True)
+
+
+# ---------- XBRL frames ------------
+# A frame holds one concept for every filer over one calendar period, so peers are
+# compared with one request per (concept, period) instead of one companyfacts download
+# per company. Instants are read at the year's last quarter end (CY2023Q4I), durations
+# over the calendar year (CY2023).
+standard_frame_units = {
+    "Assets": ("USD", True),
+    "Liabilities": ("USD", True),
+    "RetainedEarningsAccumulatedDeficit": ("USD", True),
+    "OperatingIncomeLoss": ("USD", False),
+    "StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest": ("USD", True),
+    "StockholdersEquity": ("USD", True),
+    "NetIncomeLoss": ("USD", False),
+    "EarningsPerShareBasic": ("USD-per-shares", False),
+    "CommonStockDividendsPerShareDeclared": ("USD-per-shares", False),
+    "CommonStockSharesOutstanding": ("shares", True),
+}
+
+_frames = {}
+_frames_lock = threading.Lock()
+
 
-    url_lab = ""
-    url_cal = ""
-    url_xsd = ""
-    cik = str(int(cik_matching_ticker(ticker)))
-    accession_numbers = get_filtered_filings(ticker, just_accession_numbers=True)
-    accession_number = accession_numbers.iloc[0]
-    accession_number_with_nodash = accession_number.replace("-", "")
-    int_url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_number_with_nodash}/{accession_number}-index.html"
-    int_content = requests.get(int_url, headers=headers).content
-    int_soup = BeautifulSoup(int_content, 'xml')
-    int_table = int_soup.find('table', summary="Data Files")
-    for link in int_table.find_all('a'):
-        if link.text.endswith('_lab.xml'):
-            url_lab = link.get("href")
-        if link.text.endswith('_cal.xml'):
-            url_cal = link.get("href")
-        if link.text.endswith(".xsd"):
-            url_xsd = link.get("href")
-    if url_lab == "":
-        url_lab = url_xsd
-    if url_cal == "":
-        url_cal = url_xsd
+def frame_period(year, instant):
+    """
+    Returns the frames API period of a calendar year, e.g. "CY2023" or "CY2023Q4I".
+    """
+    return f"CY{year}Q4I" if instant else f"CY{year}"
 
-    # ---------- Label Tags ------------
-    lab_url = f"https://sec.gov{url_lab}"
-    lab_content = requests.get(lab_url, headers=headers).content
-    lab_soup = BeautifulSoup(lab_content, 'xml')
-    label_tags = lab_soup.find_all('link:label')
-    label_tags.extend(lab_soup.find_all('label'))
 
-    lab_tags = {}
-    lab_pattern = re.compile(r'us-gaap_(.*?)(?:_.*?)?$')
-    common_pattern = re.compile(r'(?<=_)(.*?)(?=_)')
-
-    for tag in label_tags:
-        id = tag.get('xlink:label')
-        match1 = lab_pattern.search(id)
-        match2 = common_pattern.search(id)
-
-        if match1 is not None:
-            label_tag = match1.group(1)
-        elif match2 is not None:
-            label_tag = match2.group(1)
-        else:
-            label_tag = id
-        label = tag.text
-        if label_tag in lab_tags.keys():
-            lab_tags[label_tag].append(label)
-        else:
-            lab_tags[label_tag] = [label]
+def get_frame(taxonomy, concept, unit, period, headers=headers):
+    """
+    Returns one concept for every filer over one period, from the XBRL frames API.
 
-    # ---------- Calc Tags ------------
-    calc_url = f"https://sec.gov{url_cal}"
-    calc_content = requests.get(calc_url, headers=headers).content
-    calc_soup = BeautifulSoup(calc_content, 'xml')
+    Frames are kept in memory once loaded, on top of the HTTP cache.
 
-    calculation_arcs = calc_soup.find_all('link:calculationArc')
-    calculation_arcs.extend(calc_soup.find_all('calculationArc'))
-    calc_pattern = re.compile(r'us-gaap_(.*?)(?:_.*?)?$')
+    Args:
+        taxonomy (str): Taxonomy, e.g. "us-gaap".
+        concept (str): Concept name, e.g. "Assets".
+        unit (str): Unit as written in frames URLs, e.g. "USD" or "USD-per-shares".
+        period (str): Period, see frame_period.
+        headers (dict): Headers for HTTP request.
 
-    cal_tags = {}
-    # Iterate through each calculation arc
-    for arc in calculation_arcs:
-        # Get the 'xlink:to' and 'xlink:from' attributes
-        to_attribute = arc.get('xlink:to')
-        from_attribute = arc.get('xlink:from')
-        match_to_1 = calc_pattern.search(to_attribute)
-        match_from_1 = calc_pattern.search(from_attribute)
-
-        match_to_2 = common_pattern.search(to_attribute)
-        match_from_2 = common_pattern.search(from_attribute)
-
-        # Check if both attributes start with 'loc_us-gaap_'
-        if match_to_1:
-            under_fact = match_to_1.group(1)
-        elif match_to_2:
-            under_fact = match_to_2.group(1)
-        else:
-            under_fact = to_attribute
+    Returns:
+        DataFrame: One row per filer, indexed by 10-digit CIK, with columns accn,
+            entityName, loc, end and val (and start for durations). Empty if the SEC has
+            no such frame.
+    """
+    key = (taxonomy, concept, unit, period)
+    with _frames_lock:
+        if key in _frames:
+            return _frames[key]
+    url = f"https://data.sec.gov/api/xbrl/frames/{taxonomy}/{concept}/{unit}/{period}.json"
+    response = cached_get(url, headers=headers)
+    if response.status_code == 404:
+        data = []
+    else:
+        response.raise_for_status()
+        data = response.json()["data"]
+    frame = pd.DataFrame(data, columns=None if data else ["cik", "accn", "entityName", "loc", "end", "val"])
+    frame["cik"] = frame["cik"].astype(str).str.zfill(10)
+    frame = frame.set_index("cik")
+    with _frames_lock:
+        _frames[key] = frame
+    return frame
 
-        if match_from_1:
-            main_fact = match_from_1.group(1)
-        elif match_from_2:
-            main_fact = match_from_2.group(1)
-        else:
-            main_fact = from_attribute
 
-        if main_fact in cal_tags.keys():
-            # If it is, append the subsidiary fact to the list of values
-            cal_tags[main_fact].append(under_fact)
-        else:
-            # If not, create a new entry with the main fact as key and a list containing the subsidiary fact as value
-            cal_tags[main_fact] = [under_fact]
+def get_company_concept(cik, taxonomy, concept, headers=headers):
+    """
+    Returns all facts of one concept for one company, from the company concept API.
 
-    # Initialize an empty dictionary to hold the hierarchy
-    fact_label_hierarchy = {}
+    Args:
+        cik (int or str): CIK number.
+        taxonomy (str): Taxonomy, e.g. "us-gaap".
+        concept (str): Concept name.
+        headers (dict): Headers for HTTP request.
 
-    # Iterate through each reference_main_fact in the filtered main_facts set
-    for reference_main_fact in main_facts:
-        # Initialize a nested dictionary for each reference_main_fact
-        fact_label_hierarchy[reference_main_fact] = {}
-        if reference_main_fact not in cal_tags.keys():
-            for key in cal_tags.keys():
-                if reference_main_fact in cal_tags[key]:
-                    mf = key
-                    break
-        else:
-            mf = reference_main_fact
-        for tag_name in cal_tags[mf]:
-            fact_label_hierarchy[reference_main_fact][tag_name] = lab_tags.get(tag_name," ")
+    Returns:
+        DataFrame: Facts with FACT_STORE_COLUMNS, empty if the company never reported
+            the concept.
+    """
+    cik = str(int(cik)).zfill(10)
+    url = f"https://data.sec.gov/api/xbrl/companyconcept/CIK{cik}/{taxonomy}/{concept}.json"
+    response = cached_get(url, headers=headers)
+    if response.status_code == 404:
+        return pd.DataFrame(columns=FACT_STORE_COLUMNS)
+    response.raise_for_status()
+    document = response.json()
+    company_facts = {
+        "cik": document["cik"],
+        "entityName": document.get("entityName"),
+        "facts": {taxonomy: {concept: {"label": document.get("label"), "units": document["units"]}}},
+    }
+    return normalize_company_facts(company_facts)[0]
+
+
+def cross_sectional_main_df(fys, selected_tickers, headers=headers, max_workers=FETCH_WORKERS):
+    """
+    Builds the generate_main_df table from XBRL frames instead of company facts.
 
-    scores = {}
-    for main_fact in main_facts:
-        for actual_label in company_labels_to_assign[main_fact]:
-            scores[actual_label] = {}
-            for tag, list_of_labels in fact_label_hierarchy[main_fact].items():
-                score = best_label_score_tags(actual_label, list_of_labels)
-                scores[actual_label][tag] = score
+    The standard facts of every company are looked up in frames, loaded once per
+    (concept, year) whatever the number of companies. Only the company-specific tags
+    from get_label_calc_tags are read per company, from the company concept API.
+    Frames are aligned on calendar years, so for companies whose fiscal year does not
+    end in December the standard facts can differ from generate_main_df's fiscal year
+    values, and a company missing from a frame gets <NA>.
 
-    assigned_tags = assign_tags(scores)
+    Args:
+        fys (list): Calendar years to report.
+        selected_tickers (list): Stock ticker symbols.
+        headers (dict): Headers for HTTP request.
+        max_workers (int): Number of fetch threads.
 
-    order = ["Inventories",
-             "Accounts Receivables net",
-             "Total current assets",
-             "Property and equipment, net",
-             "Accounts payable",
-             "Current portion of long-term debt",
-             "Total current liabilities",
-             "Long-term debt, excluding current portion",
-             "Total current liabilities",
-             "Long-term debt, excluding current portion",
-             "interest expenses"]
+    Returns:
+        DataFrame: Columns Ticker, Fact, Value and FY, as in generate_main_df.
+    """
+    if not selected_tickers:
+        return pd.DataFrame()
+
+    def company_tags(ticker):
+        company = get_company(ticker, headers=headers)
+        return company.cik, company.tags["assigned_tags"]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tags_futures = [executor.submit(company_tags, ticker) for ticker in selected_tickers]
+        frame_futures = {}
+        for tag_details in standard_company_facts.values():
+            for tag in _tag_alternatives(tag_details["company_fact"]):
+                unit, instant = standard_frame_units[tag]
+                for fy in fys:
+                    frame_futures[(tag, fy)] = executor.submit(
+                        get_frame, tag_details["format"], tag, unit, frame_period(fy, instant), headers
+                    )
+
+        companies = []
+        concept_futures = {}
+        for future in tags_futures:
+            cik, assigned_tags = future.result()
+            companies.append((cik, assigned_tags))
+            for tag_details in assigned_tags.values():
+                for tag in _tag_alternatives(tag_details["company_fact"]):
+                    if (cik, tag) not in concept_futures:
+                        concept_futures[(cik, tag)] = executor.submit(
+                            get_company_concept, cik, tag_details["format"], tag, headers
+                        )
+        frames = {key: future.result() for key, future in frame_futures.items()}
+        concepts = {key: future.result() for key, future in concept_futures.items()}
+
+    company_dfs = []
+    for ticker, (cik, assigned_tags) in zip(selected_tickers, companies):
+        company_facts = _main_df_company_facts(assigned_tags)
+        fact_names = list(company_facts)
+        values = np.full((len(fact_names), len(fys)), np.nan)
+        for row, fact_name in enumerate(fact_names):
+            # Like _company_main_df, use the first alternative with values
+            for tag in _tag_alternatives(company_facts[fact_name]["company_fact"]):
+                if fact_name in assigned_tags:
+                    facts = concepts.get((cik, tag))
+                    if facts is None:
+                        continue
+                    facts = facts[(facts["form"] == "10-K") & facts["fy"].isin(fys)]
+                    if not len(facts):
+                        continue
+                    tag_values = _fiscal_year_values(facts, fys)
+                else:
+                    tag_values = np.array(
+                        [frames[(tag, fy)]["val"].get(cik, np.nan) for fy in fys], dtype="float64"
+                    )
+                if not np.isnan(tag_values).all():
+                    values[row] = tag_values
+                    break
+        company_dfs.append(_main_df_frame(ticker, fact_names, values, fys))
+    return pd.concat(company_dfs, ignore_index=True)
 
-    # Custom sorting function
-    sorted_dict = {key: assigned_tags[key] for key in order if key in assigned_tags}
-    return {"assigned_tags": sorted_dict, "scores": scores, "cal_tags": cal_tags, "lab_tags": lab_tags,
-            "fact_label_hierarchy": fact_label_hierarchy}
 
+# ---------- Fact request planner ------------
+# Rough response size per endpoint, and the cost of one request expressed in bytes, so
+# that the SEC rate limit weighs against plans made of many small calls.
+FACT_ENDPOINT_BYTES = {"companyconcept": 50_000, "companyfacts": 4_000_000, "frames": 400_000}
+FACT_REQUEST_COST_BYTES = 500_000
+_FACT_STRING_COLUMNS = ["cik", "taxonomy", "concept", "unit", "fp", "form", "accn", "frame"]
 
-def annual_facts(ticker, headers=headers):
+
+def plan_fact_query(ciks, concepts, fys=None):
     """
-    Fetches and processes annual (10-K) financial facts for a given ticker.
+    Picks the cheapest way to get some concepts of some companies.
+
+    Companies with a fresh fact store partition cost nothing. For the others, the
+    estimated cost of companyconcept calls (one per company and concept), companyfacts
+    downloads (one per company) and frames (one per concept and year, covering every
+    company) is compared; each request adds FACT_REQUEST_COST_BYTES to its response size.
+    Frames are only an option for concepts in standard_frame_units when fys is given.
 
     Args:
-        ticker (str): Stock ticker symbol.
-        headers (dict): Headers for HTTP request.
+        ciks (list): CIK numbers.
+        concepts (list): Concept names.
+        fys (list): Years wanted, or None for all.
 
     Returns:
-        DataFrame: Transposed pivot table of annual financial facts.
+        dict: "source" ("store", "companyconcept", "companyfacts" or "frames"), the
+            estimated "requests" and "bytes", and the "ciks" to fetch.
     """
-    # Get accession numbers for 10-K filings
-    accession_nums = get_filtered_filings(
-        ticker, ten_k=True, just_accession_numbers=True, headers=headers
+    ciks = [str(int(cik)).zfill(10) for cik in ciks]
+    stale = [cik for cik in ciks if not _fact_partition_is_fresh(cik)]
+    if not stale:
+        return {"source": "store", "requests": 0, "bytes": 0, "ciks": []}
+    requests_per_source = {
+        "companyconcept": len(stale) * len(concepts),
+        "companyfacts": len(stale),
+    }
+    if fys is not None and all(concept in standard_frame_units for concept in concepts):
+        requests_per_source["frames"] = len(concepts) * len(fys)
+    plans = [
+        {
+            "source": source,
+            "requests": n_requests,
+            "bytes": n_requests * FACT_ENDPOINT_BYTES[source],
+            "ciks": ciks if source == "frames" else stale,
+        }
+        for source, n_requests in requests_per_source.items()
+    ]
+    return min(plans, key=lambda plan: plan["bytes"] + plan["requests"] * FACT_REQUEST_COST_BYTES)
+
+
+def _frame_facts(taxonomy, concept, fy, ciks, headers=headers):
+    unit, instant = standard_frame_units[concept]
+    period = frame_period(fy, instant)
+    frame = get_frame(taxonomy, concept, unit, period, headers)
+    rows = frame[frame.index.isin(ciks)]
+    return pd.DataFrame(
+        {
+            "cik": rows.index,
+            "taxonomy": taxonomy,
+            "concept": concept,
+            "unit": unit.replace("-per-", "/"),
+            "start": pd.to_datetime(rows["start"]) if "start" in rows else pd.NaT,
+            "end": pd.to_datetime(rows["end"]),
+            "val": rows["val"].astype("float64"),
+            "fy": fy,
+            "fp": None,
+            "form": None,
+            "accn": rows["accn"],
+            "filed": pd.NaT,
+            "frame": period,
+        }
     )
-    # Extract and process facts data
-    df, label_dict = facts_DF(ticker, headers)
-    # Filter data for 10-K filings
-    ten_k = df[df["accn"].isin(accession_nums)]
-    ten_k = ten_k[ten_k.index.isin(accession_nums.index)]
-    # Pivot and format the data
-    pivot = ten_k.pivot_table(values="val", columns="fact", index="end")
-    pivot.rename(columns=label_dict, inplace=True)
-    return pivot.T
 
 
-def quarterly_facts(ticker, headers=headers):
+def read_facts(ciks, concepts, fys=None, taxonomy="us-gaap", headers=headers, max_workers=FETCH_WORKERS):
     """
-    Fetches and processes quarterly (10-Q) financial facts for a given ticker.
+    Reads some concepts of some companies through the plan chosen by plan_fact_query.
+
+    Every plan gives the same long table as read_fact_store. Facts read from frames are
+    aligned on calendar years: their fy is the frame's calendar year, and fp, form and
+    filed are empty.
 
     Args:
-        ticker (str): Stock ticker symbol.
+        ciks (list): CIK numbers.
+        concepts (list): Concept names.
+        fys (list): Years to keep. Defaults to all.
+        taxonomy (str): Taxonomy of the concepts.
         headers (dict): Headers for HTTP request.
+        max_workers (int): Number of concurrent downloads.
 
     Returns:
-        DataFrame: Transposed pivot table of quarterly financial facts.
+        DataFrame: Columns cik plus FACT_STORE_COLUMNS.
     """
-    # Get accession numbers for 10-Q filings
-    accession_nums = get_filtered_filings(
-        ticker, ten_k=False, just_accession_numbers=True, headers=headers
-    )
-    # Extract and process facts data
-    df, label_dict = facts_DF(ticker, headers)
-    # Filter data for 10-Q filings
-    ten_q = df[df["accn"].isin(accession_nums)]
-    ten_q = ten_q[ten_q.index.isin(accession_nums.index)].reset_index(drop=False)
-    # Remove duplicate entries
-    ten_q = ten_q.drop_duplicates(subset=["fact", "end"], keep="last")
-    # Pivot and format the data
-    pivot = ten_q.pivot_table(values="val", columns="fact", index="end")
-    pivot.rename(columns=label_dict, inplace=True)
-    return pivot.T
-
-def generate_main_df(fys, selected_tickers):
-    main_df = pd.DataFrame()
-    for ticker in selected_tickers:
-        company_facts = {
-            "Total assets": {"company_fact": "Assets", "format": "us-gaap"},
-            "Total liabilities": {"company_fact": "Liabilities", "format": "us-gaap"},
-            "Retained earnings": {"company_fact": "RetainedEarningsAccumulatedDeficit", "format": "us-gaap"},
-            "Operating Income": {"company_fact": "OperatingIncomeLoss", "format": "us-gaap"},
-            "Total stockholders' equity": {
-                "company_fact": ["StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest",
-                                 "StockholdersEquity"], "format": "us-gaap"},
-            "Net income attributable to the shareholders": {"company_fact": "NetIncomeLoss", "format": "us-gaap"},
-            "Net income per share": {"company_fact": "EarningsPerShareBasic", "format": "us-gaap"},
-            "Dividend per share": {"company_fact": "CommonStockDividendsPerShareDeclared", "format": "us-gaap"},
-            "number of share outstanding": {"company_fact": "CommonStockSharesOutstanding", "format": "us-gaap"}
-        }
-        cik = cik_matching_ticker(ticker)
-        response = requests.get(f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json", headers=headers)
-        data = response.json()['facts']
-        company_facts_update = get_label_calc_tags(ticker)['assigned_tags']
-        company_facts.update(company_facts_update)
-        company_df = pd.DataFrame()
-        for fact_name, tag_details in company_facts.items():
-            tag = tag_details['company_fact']
-            format = tag_details['format']
-            list_of_tags = data[format].keys()
-            values = []
-            tag_in_taglist = False
-            if type(tag) == type([]):
-                for t in tag:
-                    if t in list_of_tags:
-                        tag_in_taglist = True
-                        tag = t
-                        break;
-            if type(tag) == type(""):
-                if tag in list_of_tags:
-                    tag_in_taglist = True
-            if tag_in_taglist:
-                key = list(data[format][tag]['units'].keys())[0]
-                for fy in fys:
-                    available = False
-                    for info in data[format][tag]['units'][key]:
-                        if info['fy'] == fy and info['form'] == '10-K':
-                            available = True
-                            val = info['val']
-                    if available is False:
-                        val = 'N/A'
-                    values.append(val)
-            else:
-                values = ["N/A"] * len(fys)
-
-            temp = pd.DataFrame({"FY": fys, "Value": values})
-            temp['Fact'] = fact_name
-            if len(company_df) == 0:
-                company_df = temp
-            else:
-                company_df = pd.concat([company_df, temp])
-        company_df['Ticker'] = ticker
-        company_df = company_df[['Ticker', 'Fact', 'Value', 'FY']]
-        if len(main_df) == 0:
-            main_df = company_df
+    ciks = [str(int(cik)).zfill(10) for cik in ciks]
+    concepts = list(concepts)
+    plan = plan_fact_query(ciks, concepts, fys)
+    parts = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if plan["source"] == "frames":
+            futures = [
+                executor.submit(_frame_facts, taxonomy, concept, fy, plan["ciks"], headers)
+                for concept in concepts for fy in fys
+            ]
+            parts.extend(future.result() for future in futures)
+        elif plan["source"] == "companyconcept":
+            futures = {
+                (cik, concept): executor.submit(get_company_concept, cik, taxonomy, concept, headers)
+                for cik in plan["ciks"] for concept in concepts
+            }
+            for (cik, concept), future in futures.items():
+                facts = future.result()
+                if fys is not None:
+                    facts = facts[facts["fy"].isin(fys)]
+                parts.append(facts.assign(cik=cik))
         else:
-            main_df = pd.concat([main_df, company_df])
-
-    return main_df
+            list(executor.map(lambda cik: _ensure_fact_partition(cik, headers), plan["ciks"]))
+    if plan["source"] == "frames":
+        store_ciks = []
+    elif plan["source"] == "companyconcept":
+        store_ciks = [cik for cik in ciks if cik not in plan["ciks"]]
+    else:
+        store_ciks = ciks
+    if store_ciks:
+        parts.append(read_fact_store(store_ciks, concepts=concepts, fys=fys, taxonomies=[taxonomy]))
+
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return pd.DataFrame(columns=["cik"] + FACT_STORE_COLUMNS)
+    facts = pd.concat(
+        [part[["cik"] + FACT_STORE_COLUMNS].astype({column: object for column in _FACT_STRING_COLUMNS})
+         for part in parts],
+        ignore_index=True,
+    )
+    for column in _FACT_STRING_COLUMNS:
+        facts[column] = facts[column].astype("category")
+    facts["fy"] = facts["fy"].astype("Int64")
+    return facts
 
 
 def save_dataframe_to_csv(dataframe, folder_name, ticker, statement_name, frequency):
@@ -652,35 +2754,46 @@ def get_statement_file_names_in_filing_summary(ticker, accession_number, headers
         dict: Dictionary mapping statement types to their file names.
     """
     try:
-        # Set up request session and get filing summary
-        session = requests.Session()
+        # Get filing summary
         cik = cik_matching_ticker(ticker)
         base_link = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_number}"
         filing_summary_link = f"{base_link}/FilingSummary.xml"
-        filing_summary_response = session.get(
+        filing_summary_response = cached_get(
             filing_summary_link, headers=headers
         ).content.decode("utf-8")
-
-        # Parse the filing summary
-        filing_summary_soup = BeautifulSoup(filing_summary_response, "lxml-xml")
-        statement_file_names_dict = {}
-        # Extract file names for statements
-        for report in filing_summary_soup.find_all("Report"):
-            file_name = _get_file_name(report)
-            short_name, long_name = report.find("ShortName"), report.find("LongName")
-            if _is_statement_file(short_name, long_name, file_name):
-                statement_file_names_dict[short_name.text.lower()] = file_name
-        return statement_file_names_dict
+        return _parse_filing_summary(filing_summary_response)
     except requests.RequestException as e:
         print(f"An error occurred: {e}")
         return {}
 
 
-def get_statement_soup(
+def _parse_filing_summary(filing_summary_response):
+    # Parse the filing summary
+    filing_summary_soup = BeautifulSoup(filing_summary_response, "lxml-xml")
+    statement_file_names_dict = {}
+    # Extract file names for statements
+    for report in filing_summary_soup.find_all("Report"):
+        file_name = _get_file_name(report)
+        short_name, long_name = report.find("ShortName"), report.find("LongName")
+        if _is_statement_file(short_name, long_name, file_name):
+            statement_file_names_dict[short_name.text.lower()] = file_name
+    return statement_file_names_dict
+
+
+def _statement_file_link(base_link, statement_file_name_dict, statement_name, statement_keys_map):
+    # Find the specific statement link
+    for possible_key in statement_keys_map.get(statement_name.lower(), []):
+        file_name = statement_file_name_dict.get(possible_key.lower())
+        if file_name:
+            return f"{base_link}/{file_name}"
+    raise ValueError(f"Could not find statement file name for {statement_name}")
+
+
+def get_statement_content(
     ticker, accession_number, statement_name, headers, statement_keys_map
 ):
     """
-    Retrieves the BeautifulSoup object for a specific financial statement.
+    Retrieves the raw content of a specific financial statement.
 
     Args:
         ticker (str): Stock ticker symbol.
@@ -690,42 +2803,58 @@ def get_statement_soup(
         statement_keys_map (dict): Mapping of statement names to keys.
 
     Returns:
-        BeautifulSoup: Parsed HTML/XML content of the financial statement.
+        tuple: The statement file URL and its content as bytes.
 
     Raises:
         ValueError: If the statement file name is not found or if there is an error fetching the statement.
     """
-    session = requests.Session()
     cik = cik_matching_ticker(ticker)
     base_link = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_number}"
     # Get statement file names
     statement_file_name_dict = get_statement_file_names_in_filing_summary(
         ticker, accession_number, headers
     )
-    statement_link = None
-    # Find the specific statement link
-    for possible_key in statement_keys_map.get(statement_name.lower(), []):
-        file_name = statement_file_name_dict.get(possible_key.lower())
-        if file_name:
-            statement_link = f"{base_link}/{file_name}"
-            break
-    if not statement_link:
-        raise ValueError(f"Could not find statement file name for {statement_name}")
+    statement_link = _statement_file_link(
+        base_link, statement_file_name_dict, statement_name, statement_keys_map
+    )
     # Fetch the statement
     try:
-        statement_response = session.get(statement_link, headers=headers)
+        statement_response = cached_get(statement_link, headers=headers)
         statement_response.raise_for_status()  # Check for a successful request
-        # Parse and return the content
-        if statement_link.endswith(".xml"):
-            return BeautifulSoup(
-                statement_response.content, "lxml-xml", from_encoding="utf-8"
-            )
-        else:
-            return BeautifulSoup(statement_response.content, "lxml")
+        return statement_link, statement_response.content
     except requests.RequestException as e:
         raise ValueError(f"Error fetching the statement: {e}")
 
 
+def get_statement_soup(
+    ticker, accession_number, statement_name, headers, statement_keys_map
+):
+    """
+    Retrieves the BeautifulSoup object for a specific financial statement.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+        accession_number (str): SEC filing accession number.
+        statement_name (str): has to be 'balance_sheet', 'income_statement', 'cash_flow_statement'
+        headers (dict): Headers for HTTP request.
+        statement_keys_map (dict): Mapping of statement names to keys.
+
+    Returns:
+        BeautifulSoup: Parsed HTML/XML content of the financial statement.
+
+    Raises:
+        ValueError: If the statement file name is not found or if there is an error fetching the statement.
+    """
+    statement_link, content = get_statement_content(
+        ticker, accession_number, statement_name, headers, statement_keys_map
+    )
+    # Parse and return the content
+    if statement_link.endswith(".xml"):
+        return BeautifulSoup(content, "lxml-xml", from_encoding="utf-8")
+    else:
+        return BeautifulSoup(content, "lxml")
+
+
 def extract_columns_values_and_dates_from_statement(soup):
     """
     Extracts columns, values, and dates from an HTML soup object representing a financial statement.
@@ -847,6 +2976,127 @@ def keep_numbers_and_decimals_only_in_string(mixed_string: str):
     return "".join(allowed)
 
 
+# ---------- Fast statement table parser ------------
+# Parses R-file HTML straight from bytes with precompiled XPath expressions, giving the
+# same columns, values and dates as extract_columns_values_and_dates_from_statement.
+def _has_class(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+_statement_tables = etree.XPath("//table")
+_statement_date_headers = etree.XPath(f"//th[{_has_class('th')}]")
+_statement_rows = etree.XPath(".//tr")
+_statement_row_links = etree.XPath(f".//td[{_has_class('pl')}]//a")
+_statement_cells = etree.XPath(
+    f".//td[{_has_class('text')} or {_has_class('nump')} or {_has_class('num')}]"
+)
+_statement_text = etree.XPath("string()")
+_non_numeric_pattern = re.compile(r"[^0-9.]")
+_statement_date_pattern = re.compile(r"^([A-Z][a-z]{2})\.? (\d{1,2}), (\d{4})$")
+_statement_months = {abbr: number for number, abbr in enumerate(calendar.month_abbr) if abbr}
+
+
+def _only_string(element):
+    # Mirrors BeautifulSoup's Tag.string: the text of an element with a single child,
+    # following single-element chains.
+    while element is not None:
+        if len(element) == 0:
+            return element.text
+        if len(element) > 1 or element.text or element[0].tail:
+            return None
+        element = element[0]
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _statement_date(date):
+    match = _statement_date_pattern.match(date)
+    if match is None or match.group(1) not in _statement_months:
+        return None
+    try:
+        return pd.Timestamp(
+            int(match.group(3)), _statement_months[match.group(1)], int(match.group(2))
+        )
+    except ValueError:
+        return None
+
+
+def _statement_dates(root):
+    dates = []
+    for th in _statement_date_headers(root):
+        div = th.find(".//div")
+        date = _only_string(div) if div is not None else None
+        if date:
+            dates.append(date)
+    timestamps = [_statement_date(date) for date in dates]
+    if all(timestamp is not None for timestamp in timestamps):
+        return pd.DatetimeIndex(timestamps)
+    return pd.to_datetime([standardize_date(date).replace(".", "") for date in dates])
+
+
+def parse_statement_html(content):
+    """
+    Extracts columns, values, and dates from the raw HTML of a financial statement.
+
+    Args:
+        content (bytes): Raw HTML of the statement R file.
+
+    Returns:
+        tuple: Tuple containing columns, a values array of shape (len(columns), len(dates)),
+            and date_time_index.
+    """
+    root = etree.HTML(content)
+    if root is None:
+        return [], np.empty((0, 0)), pd.DatetimeIndex([])
+    date_time_index = _statement_dates(root)
+    n_dates = len(date_time_index)
+
+    tables = []
+    for table in _statement_tables(root):
+        rows = _statement_rows(table)
+        if rows:
+            tables.append((table, rows))
+    values = np.full((sum(len(rows) for _, rows in tables), n_dates), np.nan)
+
+    columns = []
+    for table, rows in tables:
+        unit_multiplier = 1
+        special_case = False
+        table_header = table.find(".//th")
+        if table_header is not None:
+            header_text = _statement_text(table_header)
+            if "in Thousands" in header_text:
+                unit_multiplier = 1
+            elif "in Millions" in header_text:
+                unit_multiplier = 1000
+            if "unless otherwise specified" in header_text:
+                special_case = True
+
+        for row in rows:
+            links = _statement_row_links(row)
+            if not links:
+                continue
+            onclick_attr = links[0].attrib["onclick"]
+            row_values = values[len(columns)]
+            columns.append(onclick_attr.split("defref_")[-1].split("',")[0])
+
+            for i, cell in enumerate(_statement_cells(row)):
+                cell_classes = cell.get("class").split()
+                if "text" in cell_classes:
+                    continue
+                value = _non_numeric_pattern.sub("", _statement_text(cell))
+                if value:
+                    value = float(value)
+                    # Like the BeautifulSoup parser, values of special case tables are not kept
+                    if not special_case:
+                        if "nump" in cell_classes:
+                            row_values[i] = value * unit_multiplier
+                        else:
+                            row_values[i] = -value * unit_multiplier
+
+    return columns, values[: len(columns)], date_time_index
+
+
 def create_dataframe_of_statement_values_columns_dates(
     values_set, columns, index_dates
 ) -> pd.DataFrame:
@@ -854,13 +3104,15 @@ def create_dataframe_of_statement_values_columns_dates(
     Creates a DataFrame from statement values, columns, and index dates.
 
     Args:
-        values_set (list): List of values for each column.
+        values_set (list or ndarray): Values for each column, one row per column.
         columns (list): List of column names.
         index_dates (pd.DatetimeIndex): DatetimeIndex for the DataFrame index.
 
     Returns:
         pd.DataFrame: DataFrame constructed from the given data.
     """
+    if isinstance(values_set, np.ndarray):
+        return pd.DataFrame(values_set.T, columns=columns, index=index_dates)
     transposed_values_set = list(zip(*values_set))
     df = pd.DataFrame(transposed_values_set, columns=columns, index=index_dates)
     return df
@@ -879,8 +3131,8 @@ def process_one_statement(ticker, accession_number, statement_name):
         pd.DataFrame or None: DataFrame of the processed statement or None if an error occurs.
     """
     try:
-        # Fetch the statement HTML soup
-        soup = get_statement_soup(
+        # Fetch the statement content
+        statement_link, content = get_statement_content(
             ticker,
             accession_number,
             statement_name,
@@ -893,27 +3145,311 @@ def process_one_statement(ticker, accession_number, statement_name):
         )
         return None
 
-    if soup:
+    if content:
         try:
-            # Extract data and create DataFrame
-            columns, values, dates = extract_columns_values_and_dates_from_statement(
-                soup
-            )
-            df = create_dataframe_of_statement_values_columns_dates(
-                values, columns, dates
-            )
-
-            if not df.empty:
-                # Remove duplicate columns
-                df = df.T.drop_duplicates()
-            else:
+            df = _statement_dataframe(statement_link, content)
+            if df is None:
                 logging.warning(
                     f"Empty DataFrame for accession number: {accession_number}"
                 )
-                return None
-
             return df
         except Exception as e:
             logging.error(f"Error processing statement: {e}")
             return None
 
+
+def _statement_dataframe(statement_link, content):
+    """
+    Parses a statement file into the DataFrame returned by process_one_statement, or
+    None if it holds no values.
+    """
+    return _statement_dataframe_from_arrays(*_statement_arrays(statement_link, content))
+
+
+def _statement_arrays(statement_link, content):
+    # Extract data as plain arrays, which are cheap to send back from worker processes
+    if statement_link.endswith(".xml"):
+        soup = BeautifulSoup(content, "lxml-xml", from_encoding="utf-8")
+        columns, values, dates = extract_columns_values_and_dates_from_statement(soup)
+        values = np.array(values, dtype=float).reshape(len(columns), len(dates))
+    else:
+        columns, values, dates = parse_statement_html(content)
+    return columns, values, dates.to_numpy()
+
+
+def _statement_dataframe_from_arrays(columns, values, dates):
+    df = create_dataframe_of_statement_values_columns_dates(
+        values, columns, pd.DatetimeIndex(dates)
+    )
+    if df.empty:
+        return None
+    # Remove duplicate columns
+    return df.T.drop_duplicates()
+
+
+# Bytes of statement files handed to worker processes and not parsed yet.
+STATEMENT_PARSE_MEMORY_BUDGET = 256 * 2**20
+
+# Statement parsers are started while download threads hold locks (rate limiter, connection
+# pools), which a forked child would inherit locked. They are started from a fork server,
+# or spawned where there is none.
+_statement_parse_context = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def parse_statements(documents, max_workers=None, memory_budget=STATEMENT_PARSE_MEMORY_BUDGET):
+    """
+    Parses statement files on a process pool.
+
+    Documents are read from the iterable only while the statement files in flight take
+    up less than memory_budget bytes, so a generator of downloads is never read far
+    ahead of the workers. A single file larger than the budget is parsed on its own.
+    Workers send back the columns, values and dates as arrays, and the DataFrames are
+    built here.
+
+    Args:
+        documents (iterable): (key, statement file URL, content bytes) tuples.
+        max_workers (int): Number of worker processes. Defaults to the number of CPUs.
+        memory_budget (int): Bytes of statement files in flight at most.
+
+    Yields:
+        tuple: (key, DataFrame or None, error message or None), in completion order. The
+            DataFrame is None when the statement holds no values or could not be parsed.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=_statement_parse_context) as executor:
+        pending = {}
+        in_flight = 0
+
+        def finished(done):
+            nonlocal in_flight
+            for future in done:
+                key, size = pending.pop(future)
+                in_flight -= size
+                try:
+                    yield key, _statement_dataframe_from_arrays(*future.result()), None
+                except Exception as e:
+                    yield key, None, str(e)
+
+        for key, statement_link, content in documents:
+            while pending and in_flight + len(content) > memory_budget:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+            future = executor.submit(_statement_arrays, statement_link, content)
+            pending[future] = (key, len(content))
+            in_flight += len(content)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from finished(done)
+
+
+def get_statements(
+    ticker,
+    accession_numbers,
+    statement_names=("balance_sheet", "income_statement", "cash_flow_statement"),
+    headers=headers,
+    max_workers=FETCH_WORKERS,
+    parse_processes=None,
+    memory_budget=STATEMENT_PARSE_MEMORY_BUDGET,
+):
+    """
+    Processes several financial statements of several filings of one company.
+
+    Each filing's FilingSummary.xml is fetched and parsed once, then every statement file
+    needed is fetched and parsed concurrently. A failing filing or statement is reported
+    in the errors and does not stop the others.
+
+    Args:
+        ticker (str): The stock ticker.
+        accession_numbers (list): SEC accession numbers, with or without dashes.
+        statement_names (list): Names of the financial statements, as in statement_keys_map.
+        headers (dict): Headers for HTTP request.
+        max_workers (int): Number of concurrent downloads.
+        parse_processes (int): Number of processes parsing the statements, see
+            parse_statements. By default they are parsed on the download threads.
+        memory_budget (int): With parse_processes, bytes of statement files in flight at
+            most. Statement files are only downloaded as the parsers take them, at most
+            max_workers ahead.
+
+    Returns:
+        tuple: {(accession_number, statement_name): DataFrame} for the statements
+            processed, and {(accession_number, statement_name): error message} for the others.
+    """
+    cik = cik_matching_ticker(ticker, headers)
+    statements = {}
+    errors = {}
+
+    def base_link(accession_number):
+        return f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_number.replace('-', '')}"
+
+    def fetch_filing_summary(accession_number):
+        response = cached_get(f"{base_link(accession_number)}/FilingSummary.xml", headers=headers)
+        response.raise_for_status()
+        return _parse_filing_summary(response.content.decode("utf-8"))
+
+    def fetch_statement(accession_number, statement_file_name_dict, statement_name):
+        statement_link = _statement_file_link(
+            base_link(accession_number), statement_file_name_dict, statement_name, statement_keys_map
+        )
+        response = cached_get(statement_link, headers=headers)
+        response.raise_for_status()
+        if parse_processes is not None:
+            return statement_link, response.content
+        df = _statement_dataframe(statement_link, response.content)
+        if df is None:
+            raise ValueError(f"Empty DataFrame for {statement_name}")
+        return df
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        summaries = {a: executor.submit(fetch_filing_summary, a) for a in accession_numbers}
+        statement_jobs = []
+        for accession_number, summary in summaries.items():
+            try:
+                statement_file_name_dict = summary.result()
+            except Exception as e:
+                for statement_name in statement_names:
+                    errors[(accession_number, statement_name)] = f"Failed to get filing summary: {e}"
+                continue
+            for statement_name in statement_names:
+                statement_jobs.append((accession_number, statement_file_name_dict, statement_name))
+        if parse_processes is None:
+            statement_futures = {
+                (job[0], job[2]): executor.submit(fetch_statement, *job) for job in statement_jobs
+            }
+            for key, future in statement_futures.items():
+                try:
+                    statements[key] = future.result()
+                except Exception as e:
+                    errors[key] = str(e)
+        else:
+            def downloaded():
+                # Downloads are submitted as the parsers take the files, so no more than
+                # max_workers files wait outside the parse budget at any time
+                jobs = iter(statement_jobs)
+                in_flight = {}
+
+                def submit_next():
+                    job = next(jobs, None)
+                    if job is not None:
+                        in_flight[executor.submit(fetch_statement, *job)] = (job[0], job[2])
+
+                for _ in range(max_workers):
+                    submit_next()
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    while done:
+                        # Popped so the handed off content is only held by the parser
+                        future = done.pop()
+                        key = in_flight.pop(future)
+                        submit_next()
+                        try:
+                            statement_link, content = future.result()
+                        except Exception as e:
+                            errors[key] = str(e)
+                            continue
+                        finally:
+                            del future
+                        yield key, statement_link, content
+                        del content
+
+            for key, df, error in parse_statements(
+                downloaded(), max_workers=parse_processes, memory_budget=memory_budget
+            ):
+                if df is not None:
+                    statements[key] = df
+                else:
+                    errors[key] = error or f"Empty DataFrame for {key[1]}"
+
+    for (accession_number, statement_name), error in errors.items():
+        logging.error(f"Error processing {statement_name} for accession number {accession_number}: {error}")
+    return statements, errors
+
+
+class StatementPanel:
+    """
+    Multi-year history of one statement, built from the DataFrames of several filings.
+
+    Frames are aligned on concept ID and period end date. Where filings overlap, such
+    as the comparative columns of consecutive 10-Ks, the value from the most recent
+    filing is kept. Values are held in a preallocated concept x period matrix that only
+    grows, by doubling, when new concepts or periods show up, so adding a filing costs
+    time proportional to its own size.
+
+    Args:
+        concept_capacity (int): Concepts to allocate room for up front.
+        period_capacity (int): Periods to allocate room for up front.
+    """
+
+    _NO_RANK = np.iinfo(np.int64).min
+
+    def __init__(self, concept_capacity=256, period_capacity=16):
+        self._concepts = {}
+        self._periods = {}
+        self._values = np.full((concept_capacity, period_capacity), np.nan)
+        self._ranks = np.full((concept_capacity, period_capacity), self._NO_RANK, dtype=np.int64)
+        self._added = 0
+
+    def __len__(self):
+        return self._added
+
+    @staticmethod
+    def _positions(keys, index):
+        return np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.intp, count=len(keys))
+
+    def _grow(self):
+        needed = (len(self._concepts), len(self._periods))
+        capacity = self._values.shape
+        if needed[0] <= capacity[0] and needed[1] <= capacity[1]:
+            return
+        shape = tuple(max(n, c * 2 if n > c else c) for n, c in zip(needed, capacity))
+        values = np.full(shape, np.nan)
+        ranks = np.full(shape, self._NO_RANK, dtype=np.int64)
+        values[: capacity[0], : capacity[1]] = self._values
+        ranks[: capacity[0], : capacity[1]] = self._ranks
+        self._values, self._ranks = values, ranks
+
+    def add(self, df, rank=None):
+        """
+        Adds one filing's statement.
+
+        Args:
+            df (DataFrame): Statement as returned by process_one_statement, with concept
+                IDs as the index and period end dates as the columns.
+            rank (int or date-like): Recency of the filing, such as its filing date.
+                Values from the highest rank win. Defaults to the order frames are added
+                in, so later frames win; do not mix the two within one panel.
+
+        Returns:
+            StatementPanel: The panel itself.
+        """
+        if rank is None:
+            rank = self._added
+        elif not isinstance(rank, (int, np.integer)):
+            rank = pd.Timestamp(rank).value
+        self._added += 1
+        if df is None or df.empty:
+            return self
+
+        rows = self._positions(list(df.index), self._concepts)
+        columns = self._positions(list(pd.DatetimeIndex(df.columns)), self._periods)
+        self._grow()
+
+        block = np.ix_(rows, columns)
+        values = self._values[block]
+        ranks = self._ranks[block]
+        new_values = df.to_numpy(dtype=float, na_value=np.nan)
+        newer = ~np.isnan(new_values) & (ranks <= rank)
+        values[newer] = new_values[newer]
+        ranks[newer] = rank
+        self._values[block] = values
+        self._ranks[block] = ranks
+        return self
+
+    def to_frame(self):
+        """
+        Returns the panel as a DataFrame of concepts by period end date, oldest period first.
+        """
+        periods = pd.DatetimeIndex(list(self._periods))
+        order = np.argsort(periods.asi8, kind="stable")
+        values = self._values[: len(self._concepts), : len(self._periods)][:, order]
+        return pd.DataFrame(values, index=list(self._concepts), columns=periods[order])
@@ -0,0 +1,125 @@
+import json
+import time
+import zipfile
+
+import pytest
+import requests
+
+import edgar_functions as ef
+
+
+def _company_facts(cik, concepts):
+    return {
+        "cik": cik,
+        "entityName": f"Company {cik}",
+        "facts": {
+            "us-gaap": {
+                concept: {
+                    "label": f"{concept} label",
+                    "description": "",
+                    "units": {"USD": [
+                        {"end": "2022-12-31", "val": val, "accn": f"0000{cik}-23-000001", "fy": 2022,
+                         "fp": "FY", "form": "10-K", "filed": "2023-02-01"},
+                        {"end": "2023-12-31", "val": val * 2, "accn": f"0000{cik}-24-000001", "fy": 2023,
+                         "fp": "FY", "form": "10-K", "filed": "2024-02-01", "frame": "CY2023Q4I"},
+                    ]},
+                }
+                for concept, val in concepts.items()
+            }
+        },
+    }
+
+
+def _submissions(cik):
+    return {
+        "cik": str(cik),
+        "name": f"Company {cik}",
+        "filings": {"recent": {
+            "accessionNumber": [f"0000{cik}-24-000001", f"0000{cik}-23-000001"],
+            "form": ["10-K", "10-K"],
+            "filingDate": ["2024-02-01", "2023-02-01"],
+            "reportDate": ["2023-12-31", "2022-12-31"],
+        }},
+    }
+
+
+def _write_zip(path, documents):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, document in documents.items():
+            archive.writestr(name, json.dumps(document, separators=(",", ":")))
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(ef, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(ef, "FACT_STORE_DIR", str(tmp_path / "cache" / "facts"))
+    ef.clear_company_handles()
+
+    def offline(*args, **kwargs):
+        raise AssertionError("bulk ingestion must not reach the SEC")
+
+    monkeypatch.setattr(ef, "sec_get", offline)
+    yield tmp_path
+    ef.clear_company_handles()
+
+
+def test_ingest_bulk_archives_offline(store):
+    companyfacts_zip = _write_zip(store / "companyfacts.zip", {
+        "CIK0000000001.json": _company_facts(1, {"Assets": 10.0, "Liabilities": 4.0}),
+        "CIK0000000002.json": _company_facts(2, {"Assets": 20.0}),
+        "CIK0000000003.json": {"cik": 3, "entityName": "No XBRL", "facts": {}},
+    })
+    submissions_zip = _write_zip(store / "submissions.zip", {
+        "CIK0000000001.json": _submissions(1),
+        "CIK0000000002.json": _submissions(2),
+        "CIK0000000002-submissions-001.json": {"accessionNumber": []},
+    })
+
+    ingested = ef.ingest_bulk_archives(companyfacts_zip, submissions_zip, max_workers=2, chunk_size=1)
+
+    assert sorted(ingested["companyfacts"]) == ["0000000001", "0000000002"]
+    assert sorted(ingested["submissions"]) == ["0000000001", "0000000002"]
+
+    facts = ef.read_fact_store(["0000000001", "0000000002"], concepts=["Assets"], fys=[2023])
+    assert facts.set_index("cik")["val"].to_dict() == {"0000000001": 20.0, "0000000002": 40.0}
+    assert ef.read_fact_labels(1)["us-gaap"]["Liabilities"] == "Liabilities label"
+
+    company = ef.get_company(ticker="ONE", cik=1)
+    assert list(company.filtered_filings(just_accession_numbers=True)) == [
+        "00001-24-000001", "00001-23-000001",
+    ]
+
+
+def test_seeded_submissions_outlive_submissions_ttl(store, monkeypatch):
+    submissions_zip = _write_zip(store / "submissions.zip", {"CIK0000000001.json": _submissions(1)})
+    ef.ingest_bulk_archives(submissions_zip=submissions_zip, max_workers=1)
+    url = "https://data.sec.gov/submissions/CIK0000000001.json"
+
+    # Hours after ingestion the seeded entry is still served without a request
+    now = time.time() + 4 * 60 * 60
+    monkeypatch.setattr(ef.time, "time", lambda: now)
+    assert ef.cached_get(url).json()["name"] == "Company 1"
+
+    fetched = []
+
+    def unreachable(url, headers):
+        fetched.append(url)
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(ef, "sec_get", unreachable)
+    now += ef.CACHE_TTLS["bulk_submissions"]
+    ef.cached_get(url)
+    assert fetched == [url]
+
+
+def test_ingest_bulk_archives_selected_ciks(store):
+    companyfacts_zip = _write_zip(store / "companyfacts.zip", {
+        "CIK0000000001.json": _company_facts(1, {"Assets": 10.0}),
+        "CIK0000000002.json": _company_facts(2, {"Assets": 20.0}),
+    })
+
+    ingested = ef.ingest_bulk_archives(companyfacts_zip, ciks=[2], max_workers=1)
+
+    assert ingested == {"companyfacts": ["0000000002"], "submissions": []}
+    assert ef.read_fact_store(["0000000001"]).empty
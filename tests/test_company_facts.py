@@ -0,0 +1,60 @@
+import json
+import tracemalloc
+
+import edgar_functions as ef
+
+
+def _document(n_concepts=3):
+    def concept(i, label):
+        return {"label": label, "description": "Fact \"quoted\" {x}", "units": {"USD": [
+            {"end": "2023-12-31", "val": i, "accn": "0000000001-24-000001", "fy": 2023, "fp": "FY",
+             "form": "10-K", "filed": "2024-02-01"},
+        ]}}
+
+    return {
+        "cik": 1,
+        "entityName": "Société Générale",
+        "facts": {
+            "dei": {"EntityCommonStockSharesOutstanding": concept(0, "Shares outstanding")},
+            "us-gaap": {f"Concept{i}": concept(i, f"Concept {i} – café") for i in range(n_concepts)},
+            "srt": {"Concept0": concept(99, "Other taxonomy")},
+        },
+    }
+
+
+def _compact(document):
+    return json.dumps(document, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _expected(document, concepts=None, taxonomies=None):
+    return [
+        (taxonomy, concept, details)
+        for taxonomy, concept_map in document["facts"].items() if taxonomies is None or taxonomy in taxonomies
+        for concept, details in concept_map.items() if concepts is None or concept in concepts
+    ]
+
+
+def test_iter_company_facts_matches_json():
+    document = _document()
+    content = _compact(document)
+
+    assert list(ef.iter_company_facts(content)) == _expected(document)
+    assert list(ef.iter_company_facts(content, concepts=["Concept0"])) == _expected(document, ["Concept0"])
+    assert list(ef.iter_company_facts(content, concepts=["Concept0"], taxonomies=["srt"])) == [
+        ("srt", "Concept0", document["facts"]["srt"]["Concept0"]),
+    ]
+    # Documents not in the compact layout are parsed whole
+    indented = json.dumps(document, indent=2).encode("utf-8")
+    assert list(ef.iter_company_facts(indented, concepts=["Concept1"])) == _expected(document, ["Concept1"])
+
+
+def test_iter_company_facts_memory_follows_requested_concepts():
+    content = _compact(_document(n_concepts=20_000))
+
+    tracemalloc.start()
+    facts = list(ef.iter_company_facts(content, concepts=["Concept7"]))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert [(taxonomy, concept) for taxonomy, concept, _ in facts] == [("us-gaap", "Concept7")]
+    assert peak < len(content) / 2
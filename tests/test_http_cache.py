@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+import edgar_functions as ef
+
+
+class _Response:
+    status_code = 200
+    headers = {"Content-Type": "application/json"}
+    content = b'{"ok": true}'
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ef, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(ef, "FACT_STORE_DIR", str(tmp_path / "facts"))
+    monkeypatch.setattr(ef, "TAG_STORE_DIR", str(tmp_path / "tags"))
+    monkeypatch.setattr(ef, "REFRESH_STATE_PATH", str(tmp_path / "refresh_state.json"))
+    return tmp_path
+
+
+def test_clear_http_cache_keeps_stores(cache_dir, monkeypatch):
+    fetched = []
+    monkeypatch.setattr(ef, "sec_get", lambda url, headers: fetched.append(url) or _Response())
+    url = "https://www.sec.gov/Archives/edgar/data/1/000000000124000001/FilingSummary.xml"
+    ef.cached_get(url, headers={})
+    ef.cached_get(url, headers={})
+    assert fetched == [url]
+    assert ef._cache_path(url).startswith(os.path.join(str(cache_dir), "http"))
+
+    ef.write_fact_store({"cik": 1, "entityName": "Company 1", "facts": {"us-gaap": {"Assets": {
+        "label": "Assets", "units": {"USD": [{"end": "2023-12-31", "val": 1.0, "fy": 2023, "form": "10-K"}]},
+    }}}})
+    ef._write_refresh_state({"0000000001": {"filingDate": "2024-02-01", "accessionNumbers": []}})
+    legacy_entry = cache_dir / "ab" / ("ab" + "0" * 62)
+    legacy_entry.parent.mkdir()
+    legacy_entry.write_bytes(b"")
+
+    ef.clear_http_cache()
+
+    assert not (cache_dir / "http").exists()
+    assert not legacy_entry.parent.exists()
+    assert len(ef.read_fact_store(["0000000001"])) == 1
+    assert ef._read_refresh_state() == {"0000000001": {"filingDate": "2024-02-01", "accessionNumbers": []}}
+    ef.cached_get(url, headers={})
+    assert fetched == [url, url]
@@ -0,0 +1,60 @@
+import collections
+
+import numpy as np
+import pytest
+from fuzzywuzzy import fuzz
+
+import edgar_functions as ef
+
+# Labels to assign, as in _compute_label_calc_tags, and labels as filers write them
+TARGETS = [
+    "Inventories", "Total current assets", "Property, plant and equipment, net",
+    "Operating lease right-of-use assets", "Goodwill", "Accounts payable",
+    "Accrued expenses", "Total current liabilities", "Long-term debt", "Interest expenses",
+    "Cost of sales", "Selling, general and administrative expenses", "Net sales",
+]
+CANDIDATES = [
+    "Inventory, Net", "expense inventory inventories total", "Assets, Current",
+    "Total current assets", "Property, Plant and Equipment, Net", "Property and equipment, net",
+    "Operating Lease, Right-of-Use Asset", "Goodwill", "Goodwill, Impairment Loss",
+    "Accounts Payable, Current", "Accrued Liabilities, Current", "Accrued expenses and other",
+    "Liabilities, Current", "Long-term Debt, Noncurrent", "Interest Expense",
+    "Interest expense, net", "Cost of Goods and Services Sold", "Cost of sales",
+    "Selling, General and Administrative Expense", "SG&A expenses",
+    "Revenue from Contract with Customer, Excluding Assessed Tax", "Net sales",
+    "Net sales — Company-operated restaurants", "Café & bakery sales",
+]
+
+
+def _fuzzywuzzy_score(target, candidate):
+    return (
+        fuzz.token_sort_ratio(target, candidate)
+        + fuzz.WRatio(target, candidate)
+        + fuzz.token_set_ratio(target, candidate)
+    ) / 3
+
+
+@pytest.fixture(autouse=True)
+def pair_scores(monkeypatch):
+    monkeypatch.setattr(ef, "_label_pair_scores", collections.OrderedDict())
+    return ef._label_pair_scores
+
+
+def test_label_similarity_matches_fuzzywuzzy():
+    expected = np.array([[_fuzzywuzzy_score(t, c) for c in CANDIDATES] for t in TARGETS])
+
+    np.testing.assert_array_equal(ef.label_similarity_matrix(TARGETS, CANDIDATES), expected)
+    # Memoized scores are the same
+    np.testing.assert_array_equal(ef.label_similarity_matrix(TARGETS, CANDIDATES), expected)
+    # rapidfuzz's WRatio would put this pair above the 60 threshold of max_value_key
+    assert ef.best_label_score_tags("interest expenses", ["expense inventory inventories total"]) == 59.0
+
+
+def test_label_pair_scores_are_capped(pair_scores, monkeypatch):
+    monkeypatch.setattr(ef, "LABEL_PAIR_SCORE_LIMIT", 10)
+
+    matrix = ef.label_similarity_matrix(TARGETS, CANDIDATES)
+
+    assert len(pair_scores) == 10
+    assert list(pair_scores) == [(TARGETS[-1], c) for c in CANDIDATES[-10:]]
+    assert matrix[0, 0] == _fuzzywuzzy_score(TARGETS[0], CANDIDATES[0])
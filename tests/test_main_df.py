@@ -0,0 +1,121 @@
+import pandas as pd
+import pytest
+
+import edgar_functions as ef
+
+
+def _units(values):
+    return {"USD": [
+        {"end": f"{fy}-12-31", "val": val, "accn": f"0000000001-{fy % 100 + 1}-000001", "fy": fy,
+         "fp": "FY", "form": "10-K", "filed": f"{fy + 1}-02-01"}
+        for fy, val in values.items()
+    ]}
+
+
+# StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest is only
+# reported before the years asked for, so StockholdersEquity fills the fact
+CONCEPTS = {
+    "Assets": {2022: 10.0, 2023: 20.0},
+    "StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest": {2020: 1.0},
+    "StockholdersEquity": {2022: 3.0, 2023: 4.0},
+    "InventoryNet": {2023: 5.0},
+}
+ASSIGNED_TAGS = {"Inventories": {"company_fact": "InventoryNet", "format": "us-gaap"}}
+
+
+class _Response:
+    def __init__(self, document):
+        self.document = document
+        self.status_code = 200 if document is not None else 404
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.document
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(ef, "FACT_STORE_DIR", str(tmp_path / "facts"))
+    return tmp_path
+
+
+def _values(df):
+    df = df.dropna(subset=["Value"])
+    return {(fact, fy): value for fact, fy, value in zip(df["Fact"], df["FY"], df["Value"])}
+
+
+EXPECTED = {
+    ("Total assets", 2022): 10.0,
+    ("Total assets", 2023): 20.0,
+    ("Total stockholders' equity", 2022): 3.0,
+    ("Total stockholders' equity", 2023): 4.0,
+    ("Inventories", 2023): 5.0,
+}
+
+
+def test_company_main_df_from_store(store, monkeypatch):
+    ef.write_fact_store({
+        "cik": 1,
+        "entityName": "Company 1",
+        "facts": {"us-gaap": {
+            concept: {"label": concept, "units": _units(values)} for concept, values in CONCEPTS.items()
+        }},
+    })
+    monkeypatch.setattr(ef, "cached_get", lambda url, **kwargs: pytest.fail(f"fetched {url}"))
+
+    df = ef._company_main_df("ONE", "0000000001", [2022, 2023], ASSIGNED_TAGS)
+
+    assert list(df.columns) == ["Ticker", "Fact", "Value", "FY"]
+    assert len(df) == len(ef._main_df_company_facts(ASSIGNED_TAGS)) * 2
+    assert _values(df) == EXPECTED
+
+
+def test_company_main_df_through_companyconcept(store, monkeypatch):
+    # Few concepts against a large companyfacts download: the planner fetches concepts
+    monkeypatch.setitem(ef.FACT_ENDPOINT_BYTES, "companyfacts", 100_000_000)
+    urls = []
+
+    def cached_get(url, **kwargs):
+        urls.append(url)
+        assert "/companyconcept/CIK0000000001/us-gaap/" in url
+        concept = url.rsplit("/", 1)[-1].removesuffix(".json")
+        if concept not in CONCEPTS:
+            return _Response(None)
+        return _Response({"cik": 1, "entityName": "Company 1", "label": concept,
+                          "units": _units(CONCEPTS[concept])})
+
+    monkeypatch.setattr(ef, "cached_get", cached_get)
+
+    df = ef._company_main_df("ONE", "0000000001", [2022, 2023], ASSIGNED_TAGS)
+
+    assert _values(df) == EXPECTED
+    assert any(url.endswith("/InventoryNet.json") for url in urls)
+    assert not (store / "facts").exists()
+
+
+def test_cross_sectional_main_df_uses_first_reported_alternative(monkeypatch):
+    class _Company:
+        cik = "0000000001"
+        tags = {"assigned_tags": ASSIGNED_TAGS}
+
+    monkeypatch.setattr(ef, "get_company", lambda ticker, headers: _Company())
+
+    def get_frame(taxonomy, concept, unit, period, headers):
+        fy = int(period[2:6])
+        values = CONCEPTS.get(concept, {})
+        return pd.DataFrame({"val": [values[fy]] if fy in values else []},
+                               index=pd.Index(["0000000001"] if fy in values else [], name="cik"))
+
+    def get_company_concept(cik, taxonomy, concept, headers):
+        return ef.normalize_company_facts({"cik": 1, "entityName": "Company 1", "facts": {
+            taxonomy: {concept: {"label": concept, "units": _units(CONCEPTS[concept])}},
+        }})[0]
+
+    monkeypatch.setattr(ef, "get_frame", get_frame)
+    monkeypatch.setattr(ef, "get_company_concept", get_company_concept)
+
+    df = ef.cross_sectional_main_df([2022, 2023], ["ONE"])
+
+    assert _values(df) == EXPECTED
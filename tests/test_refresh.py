@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+import edgar_functions as ef
+
+
+class _Response:
+    def __init__(self, document):
+        self.document = document
+
+    def json(self):
+        return self.document
+
+
+def _submissions(filings):
+    return {"filings": {"recent": {
+        "accessionNumber": [accession_number for accession_number, _, _ in filings],
+        "form": [form for _, form, _ in filings],
+        "filingDate": [filed for _, _, filed in filings],
+    }}}
+
+
+@pytest.fixture
+def filings(tmp_path, monkeypatch):
+    filings = []
+    monkeypatch.setattr(ef, "REFRESH_STATE_PATH", str(tmp_path / "refresh_state.json"))
+    monkeypatch.setattr(ef, "ciks_for_tickers", lambda tickers, headers: {"ONE": "0000000001"})
+    monkeypatch.setattr(ef, "cached_get", lambda url, **kwargs: _Response(_submissions(filings)))
+    monkeypatch.setattr(ef, "_ensure_fact_partition", lambda cik, headers, refresh: None)
+    return filings
+
+
+def test_refresh_same_day_filings_seen_once(filings):
+    filings[:] = [
+        ("0000000001-24-000002", "10-Q", "2024-05-01"),
+        ("0000000001-24-000001", "10-Q", "2024-05-01"),
+        ("0000000001-24-000000", "8-K", "2024-05-01"),
+    ]
+    first = ef.refresh_companies(["ONE"])
+    assert [filing["accessionNumber"] for filing in first["ONE"]] == [
+        "0000000001-24-000002", "0000000001-24-000001",
+    ]
+    assert ef.refresh_companies(["ONE"]) == {}
+
+    filings.insert(0, ("0000000001-24-000003", "10-Q/A", "2024-05-01"))
+    filings.insert(0, ("0000000001-24-000004", "10-Q", "2024-05-01"))
+    second = ef.refresh_companies(["ONE"])
+    assert [filing["accessionNumber"] for filing in second["ONE"]] == ["0000000001-24-000004"]
+    assert ef.refresh_companies(["ONE"]) == {}
+
+
+def test_refresh_reads_single_accession_state(filings):
+    filings[:] = [
+        ("0000000001-24-000002", "10-Q", "2024-05-01"),
+        ("0000000001-24-000001", "10-Q", "2024-05-01"),
+        ("0000000001-23-000001", "10-Q", "2023-11-01"),
+    ]
+    ef._write_refresh_state({
+        "0000000001": {"accessionNumber": "0000000001-24-000001", "filingDate": "2024-05-01"},
+    })
+    first = ef.refresh_companies(["ONE"])
+    assert [filing["accessionNumber"] for filing in first["ONE"]] == ["0000000001-24-000002"]
+    assert ef.refresh_companies(["ONE"]) == {}
+
+
+def test_refresh_since_keeps_companies_without_state(filings, monkeypatch):
+    filings[:] = [("0000000001-24-000001", "10-Q", "2024-05-01")]
+    monkeypatch.setattr(ef, "ciks_for_tickers",
+                        lambda tickers, headers: {"ONE": "0000000001", "TWO": "0000000002"})
+    monkeypatch.setattr(ef, "daily_index_filings",
+                        lambda date, headers: pd.DataFrame(columns=["cik", "form", "filingDate", "accessionNumber"]))
+    since = pd.Timestamp.today().normalize() - pd.Timedelta(days=3)
+
+    # Neither company is in the daily indexes, but neither has a baseline yet
+    assert sorted(ef.refresh_companies(["ONE", "TWO"], since=since)) == ["ONE", "TWO"]
+    assert sorted(ef._read_refresh_state()) == ["0000000001", "0000000002"]
+    assert ef.refresh_companies(["ONE", "TWO"], since=since) == {}